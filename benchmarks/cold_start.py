@@ -0,0 +1,148 @@
+# benchmarks/cold_start.py
+#
+# Measures cold-start cost of the search API and the ES indexer: the time to
+# import each service's main module in a fresh interpreter, and the time to
+# build its first client. Secrets are supplied through env overrides so no
+# GCP access is needed.
+#
+# Secret Manager and BigQuery clients are swapped for the stand-ins, but the
+# real packages are still imported when installed, so their import cost is
+# counted. --secret-latency-ms adds a simulated round trip per secret fetch.
+# A tree whose main has no get_es() builds its clients at import, which
+# import_ms then includes; first_client_ms is reported as n/a.
+#
+# Usage:
+#   python benchmarks/cold_start.py                       # 10 runs per service
+#   python benchmarks/cold_start.py --runs 20 --json out.json
+#   python benchmarks/cold_start.py --max-import-ms 800   # fail on regression
+#   python benchmarks/cold_start.py --ref HEAD~5 --secret-latency-ms 50  # an older revision
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+
+SERVICES = {
+    "search_api":    "search_api",
+    "es_indexer_fn": os.path.join("cloud_functions", "es_indexer_fn "),
+}
+
+# Runs inside the child interpreter; prints one JSON line of timings
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {bench_dir!r})
+import standins
+from standins import bigquery, secretmanager
+secretmanager.LATENCY_SEC = {latency_sec!r}
+standins.patch_import("google.cloud.secretmanager", secretmanager,
+                      SecretManagerServiceClient=secretmanager.SecretManagerServiceClient)
+standins.patch_import("google.cloud.bigquery", bigquery, Client=bigquery.Client)
+
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+get_es = getattr(main, "get_es", None)
+if get_es is not None:
+    get_es()
+t2 = time.perf_counter()
+print(json.dumps({{
+    "import_ms":       (t1 - t0) * 1000,
+    "first_client_ms": (t2 - t1) * 1000 if get_es is not None else None,
+}}))
+"""
+
+
+def child_env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("ELASTIC_ENDPOINT", "http://localhost:9200")
+    env.setdefault("ELASTIC_API_KEY", "benchmark")
+    env.setdefault("GCP_PROJECT", "benchmark")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def run_once(service_dir: str, latency_sec: float) -> dict:
+    probe = PROBE.format(bench_dir=BENCH_DIR, latency_sec=latency_sec)
+    proc = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=service_dir,
+        env=child_env(),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"probe failed in {service_dir}:\n{proc.stderr}")
+    # Warm-up threads may log to stdout too; pick out the probe's line
+    line = next(l for l in proc.stdout.splitlines() if l.startswith('{"import_ms"'))
+    return json.loads(line)
+
+
+def summarize(samples: list) -> dict:
+    if any(s is None for s in samples):
+        return None
+    return {
+        "median": statistics.median(samples),
+        "min":    min(samples),
+        "max":    max(samples),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for search_api and es_indexer_fn")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--service", choices=sorted(SERVICES), action="append",
+                        help="limit to one or more services (default: all)")
+    parser.add_argument("--json", dest="json_path", help="also write results to this file")
+    parser.add_argument("--max-import-ms", type=float,
+                        help="exit non-zero if any service's median import time exceeds this")
+    parser.add_argument("--ref", help="measure the services as of this git revision instead of the working tree")
+    parser.add_argument("--secret-latency-ms", type=float, default=0.0,
+                        help="simulated Secret Manager round trip per secret fetch")
+    args = parser.parse_args()
+
+    worktree = None
+    root = REPO_ROOT
+    if args.ref:
+        worktree = tempfile.mkdtemp(prefix="cold-start-")
+        subprocess.run(["git", "-C", REPO_ROOT, "worktree", "add", "--detach", worktree, args.ref],
+                       check=True, capture_output=True)
+        root = worktree
+
+    results = {}
+    try:
+        for name in args.service or sorted(SERVICES):
+            service_dir = os.path.join(root, SERVICES[name])
+            samples = [run_once(service_dir, args.secret_latency_ms / 1000) for _ in range(args.runs)]
+            results[name] = {
+                "import_ms":       summarize([s["import_ms"] for s in samples]),
+                "first_client_ms": summarize([s["first_client_ms"] for s in samples]),
+            }
+            first_client = results[name]["first_client_ms"]
+            first_client = f"{first_client['median']:8.1f} ms" if first_client else "     n/a   "
+            print(f"{name:<15} import {results[name]['import_ms']['median']:8.1f} ms   "
+                  f"first client {first_client}   (median of {args.runs})")
+    finally:
+        if worktree:
+            subprocess.run(["git", "-C", REPO_ROOT, "worktree", "remove", "--force", worktree],
+                           check=True, capture_output=True)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.max_import_ms is not None:
+        slow = [n for n, r in results.items() if r["import_ms"]["median"] > args.max_import_ms]
+        if slow:
+            print(f"[ERROR] import time above {args.max_import_ms} ms: {', '.join(slow)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
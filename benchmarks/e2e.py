@@ -0,0 +1,489 @@
+# benchmarks/e2e.py
+#
+# Local end-to-end benchmark of the ingestion pipeline and the search API.
+# Every service runs unmodified against local stand-ins (see standins/):
+# a filesystem bucket, an in-memory Pub/Sub topic, a SQLite-backed BigQuery
+# and an in-memory Elasticsearch (or a real one via --es-url).
+#
+# Stages, in pipeline order (the whole pipeline runs --iterations times):
+#   gtfs_processor_fn      GTFS/ -> Processed/route_bounds.csv, gtfs_summary.csv
+#   gps_publisher_fn       --batches publish rounds, one ping per route
+#   pubsub_to_bigquery     drain the topic into real_time.vehicle_locations
+#                          (what the Dataflow job does in production)
+#   process_reports        parse --reports incident blobs -> real_time.incidents
+#   integrator_fn          integration_query.sql -> real_time.integrated
+#   es_indexer_fn          real_time.integrated -> transit-integrated index
+#   search / search.columnar   --queries calls to the /search handler
+#
+# For each stage it reports throughput, latency percentiles and peak Python
+# heap (tracemalloc), and appends the run to a JSON-lines history keyed by git
+# commit so results can be compared across commits.
+#
+# Usage:
+#   python benchmarks/e2e.py
+#   python benchmarks/e2e.py --routes 200 --batches 20 --reports 500 --queries 500
+#   python benchmarks/e2e.py --es-url http://localhost:9200
+
+import argparse
+import asyncio
+import csv
+import importlib.util
+import inspect
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import standins
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GTFS_DIR = os.path.join(REPO_ROOT, "GTFS")
+FUNCTIONS_DIR = os.path.join(REPO_ROOT, "cloud_functions")
+SEARCH_API_DIR = os.path.join(REPO_ROOT, "search_api")
+DEFAULT_HISTORY = os.path.join(REPO_ROOT, "benchmarks", "results", "e2e.jsonl")
+
+PROJECT = "local"
+GTFS_BUCKET = "gtfs"
+INCIDENTS_BUCKET = "incidents"
+TOPIC = "vehicle-locations"
+ES_INDEX = "transit-integrated"
+
+
+def _load_table_schemas() -> dict:
+    """
+    Source table columns from integrator_fn/schema.py, keyed by full table ID.
+    """
+    path = os.path.join(FUNCTIONS_DIR, "integrator_fn ", "schema.py")
+    spec = importlib.util.spec_from_file_location("bench_integrator_schema", path)
+    schema = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(schema)
+    return {f"{PROJECT}.{table}": dict(t["columns"]) for table, t in schema.TABLES.items()}
+
+
+# BigQuery source tables (the integrated table is created by the query itself)
+TABLES = _load_table_schemas()
+
+
+# ------------------------------------------------------------------------------
+# Fixture: GTFS feed and incident reports at the requested scale
+# ------------------------------------------------------------------------------
+
+def _is_lfs_pointer(path: str) -> bool:
+    with open(path, encoding="utf-8") as f:
+        return f.readline().startswith("version https://git-lfs")
+
+
+def _read_csv(path: str) -> list:
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def _write_csv(path: str, fieldnames: list, rows: list) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def prepare_gtfs(bucket_dir: str, args, rng: random.Random) -> int:
+    """
+    Copies the bundled feed into the GTFS bucket, cut down to --routes routes.
+    stop_times.txt is stored in Git LFS; when only the pointer is checked out,
+    --trips-per-route x --stops-per-trip stop times are synthesized instead.
+    Returns the number of stop_times rows written.
+    """
+    os.makedirs(bucket_dir, exist_ok=True)
+    for name in ("agency.txt", "calendar.txt", "stops.txt"):
+        shutil.copy(os.path.join(GTFS_DIR, name), bucket_dir)
+
+    trips_by_route = {}
+    for trip in _read_csv(os.path.join(GTFS_DIR, "trips.txt")):
+        trips_by_route.setdefault(trip["route_id"], []).append(trip)
+    routes = [r for r in _read_csv(os.path.join(GTFS_DIR, "routes.txt")) if r["route_id"] in trips_by_route]
+    routes = routes[:args.routes]
+    route_ids = {r["route_id"] for r in routes}
+    trips = [t for rid in route_ids for t in trips_by_route[rid][:args.trips_per_route]]
+    trip_ids = {t["trip_id"] for t in trips}
+
+    _write_csv(os.path.join(bucket_dir, "routes.txt"), list(routes[0].keys()), routes)
+    _write_csv(os.path.join(bucket_dir, "trips.txt"), list(trips[0].keys()), trips)
+
+    fields = ["trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"]
+    stop_times_src = os.path.join(GTFS_DIR, "stop_times.txt")
+    if not _is_lfs_pointer(stop_times_src):
+        with open(stop_times_src, newline="", encoding="utf-8") as f:
+            stop_times = [r for r in csv.DictReader(f) if r["trip_id"] in trip_ids]
+        fields = list(stop_times[0].keys()) if stop_times else fields
+    else:
+        stop_ids = [s["stop_id"] for s in _read_csv(os.path.join(GTFS_DIR, "stops.txt"))]
+        now = datetime.now(timezone.utc)
+        now_secs = now.hour * 3600 + now.minute * 60 + now.second
+        last_start = 24 * 3600 - args.stops_per_trip * 120 - 1
+        stop_times = []
+        for trip in trips:
+            first = rng.randrange(len(stop_ids) - args.stops_per_trip)
+            # Start trips within the last hour so pings have upcoming stops to
+            # join against; keep them inside today, as the integration does
+            start = min(max(0, now_secs - rng.randrange(0, 3600)), last_start)
+            for seq in range(args.stops_per_trip):
+                secs = start + seq * 120
+                hhmmss = f"{secs // 3600:02d}:{secs % 3600 // 60:02d}:{secs % 60:02d}"
+                stop_times.append({
+                    "trip_id": trip["trip_id"], "arrival_time": hhmmss, "departure_time": hhmmss,
+                    "stop_id": stop_ids[first + seq], "stop_sequence": seq + 1,
+                })
+    _write_csv(os.path.join(bucket_dir, "stop_times.txt"), fields, stop_times)
+    return len(stop_times)
+
+
+def prepare_reports(bucket_dir: str, args, rng: random.Random, stop_names: list) -> None:
+    """
+    Writes --reports incident blobs in the fetch_reports output format (one
+    news report in five, the rest tweets) into today's reports folder.
+    """
+    now = datetime.now(timezone.utc)
+    folder = os.path.join(bucket_dir, f"reports_{now.strftime('%Y%m%d')}")
+    os.makedirs(folder, exist_ok=True)
+    for i in range(args.reports):
+        stop = rng.choice(stop_names)
+        ts = (now - timedelta(seconds=rng.randint(0, 14 * 60))).isoformat()
+        if i % 5 == 0:
+            text = (f"Title: Incident at {stop}\nIncident: A random event occurred near {stop}.\n"
+                    f"Severity: {rng.randint(1, 5)}\nTime: {ts}\n")
+        else:
+            text = f"tweet: Traffic buildup at {stop}\ntime: {ts}"
+        with open(os.path.join(folder, f"report_{i:04d}.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def load_gtfs_summary_norm(bq, bucket_dir: str) -> None:
+    """
+    Builds legacy_gtfs.gtfs_summary_norm from the processor's gtfs_summary.csv:
+    stop names joined in, HH:MM:SS schedule times pinned to today (UTC) and
+    route_id normalized to the "142.0" form gps_publisher_fn puts in
+    vehicle_id (pandas reads route_bounds.csv rows as floats).
+    """
+    names = {s["stop_id"]: s["stop_name"] for s in _read_csv(os.path.join(bucket_dir, "stops.txt"))}
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    rows = []
+    for r in _read_csv(os.path.join(bucket_dir, "Processed", "gtfs_summary.csv")):
+        h, m, s = (int(p) for p in r["scheduled_time"].split(":"))
+        rows.append({
+            "route_id": str(float(r["route_id"])),
+            "stop_id": r["stop_id"],
+            "stop_name": names.get(r["stop_id"]),
+            "scheduled_time": (today + timedelta(hours=h, minutes=m, seconds=s)).isoformat(),
+        })
+    table = f"{PROJECT}.legacy_gtfs.gtfs_summary_norm"
+    standins.bigquery.create_table(table, TABLES[table])
+    errors = bq.insert_rows_json(table, rows)
+    if errors:
+        raise RuntimeError(f"gtfs_summary_norm load failed: {errors[:3]}")
+
+
+# ------------------------------------------------------------------------------
+# Loading services
+# ------------------------------------------------------------------------------
+
+_LOOP = asyncio.new_event_loop()
+
+
+@contextmanager
+def cwd(path: str):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def load_service(directory: str, name: str, env: dict):
+    """
+    Imports <directory>/main.py as module `name` with `env` applied. Sibling
+    modules (e.g. startup.py) are re-imported from this directory, since each
+    service ships its own copy.
+    """
+    os.environ.update(env)
+    for fn in os.listdir(directory):
+        if fn.endswith(".py") and fn != "main.py":
+            sys.modules.pop(fn[:-3], None)
+    sys.path.insert(0, directory)
+    try:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(directory, "main.py"))
+        module = importlib.util.module_from_spec(spec)
+        with cwd(directory):
+            spec.loader.exec_module(module)
+        return module
+    finally:
+        sys.path.remove(directory)
+
+
+def call_endpoint(endpoint, **params):
+    """
+    Calls a FastAPI endpoint coroutine directly, filling every parameter not
+    given from its Query/Header default.
+    """
+    for name, p in inspect.signature(endpoint).parameters.items():
+        if name not in params:
+            params[name] = getattr(p.default, "default", p.default)
+    return _LOOP.run_until_complete(endpoint(**params))
+
+
+# ------------------------------------------------------------------------------
+# Measurement
+# ------------------------------------------------------------------------------
+
+class Stage:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies = []
+        self.items = 0
+        self.busy = 0.0
+        self.peak_bytes = 0
+        self.extra = {}
+
+    @contextmanager
+    def measure(self, items: int = 1):
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        self.latencies.append(elapsed)
+        self.busy += elapsed
+        self.items += items
+        if tracemalloc.is_tracing():
+            self.peak_bytes = max(self.peak_bytes, tracemalloc.get_traced_memory()[1])
+
+    def summary(self) -> dict:
+        ms = sorted(l * 1000 for l in self.latencies)
+
+        def pct(p):
+            return ms[min(len(ms) - 1, int(round(p / 100 * (len(ms) - 1))))]
+
+        out = {
+            "calls":          len(ms),
+            "items":          self.items,
+            "items_per_sec":  self.items / self.busy if self.busy else 0.0,
+            "p50_ms":         pct(50),
+            "p95_ms":         pct(95),
+            "p99_ms":         pct(99),
+            "mean_ms":        statistics.fmean(ms),
+            "peak_mem_mb":    self.peak_bytes / 2 ** 20 if self.peak_bytes else None,
+        }
+        out.update(self.extra)
+        return out
+
+
+def git_revision() -> str:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# ------------------------------------------------------------------------------
+# Pipeline
+# ------------------------------------------------------------------------------
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="transit-bench-")
+    gcs_root = os.path.join(workdir, "gcs")
+    standins.install(gcs_root, fake_es=not args.es_url)
+
+    stop_times_rows = prepare_gtfs(os.path.join(gcs_root, GTFS_BUCKET), args, rng)
+    stop_names = [s["stop_name"] for s in _read_csv(os.path.join(GTFS_DIR, "stops.txt"))]
+    prepare_reports(os.path.join(gcs_root, INCIDENTS_BUCKET), args, rng, stop_names)
+    for table, schema in TABLES.items():
+        standins.bigquery.create_table(table, schema)
+    bq = standins.bigquery.Client(project=PROJECT)
+
+    es_env = {
+        "ELASTIC_ENDPOINT": args.es_url or "http://localhost:9200",
+        "ELASTIC_API_KEY":  args.es_api_key or "local",
+    }
+    stages = {name: Stage(name) for name in (
+        "gtfs_processor_fn", "gps_publisher_fn", "pubsub_to_bigquery", "process_reports",
+        "process_reports.parse_blob", "integrator_fn", "es_indexer_fn", "search", "search.columnar",
+    )}
+
+    gtfs_processor = load_service(os.path.join(FUNCTIONS_DIR, "gtfs_processor_fn "), "bench_gtfs_processor_fn",
+                                  {"BUCKET": GTFS_BUCKET})
+    if args.memory:
+        tracemalloc.start()
+
+    for _ in range(args.iterations):
+        # 1) GTFS processing
+        with stages["gtfs_processor_fn"].measure(items=stop_times_rows):
+            gtfs_processor.process_gtfs()
+        load_gtfs_summary_norm(bq, os.path.join(gcs_root, GTFS_BUCKET))
+
+        # 2) GPS publishing; the module reads route_bounds.csv at import
+        publisher = load_service(os.path.join(FUNCTIONS_DIR, "gps_publisher_fn "), "bench_gps_publisher_fn", {
+            "L2C_PROJECT_ID": PROJECT, "L2C_GTFS_BUCKET": GTFS_BUCKET,
+        })
+        for _ in range(args.batches):
+            with stages["gps_publisher_fn"].measure(items=len(publisher.ROUTES)):
+                publisher.run_publisher()
+
+        # 3) Pub/Sub -> BigQuery, as the streaming Dataflow job would
+        with stages["pubsub_to_bigquery"].measure(items=0):
+            messages = standins.pubsub.drain(publisher.topic_path)
+            rows = [json.loads(m.decode("utf-8")) for m in messages]
+            errors = bq.insert_rows_json(f"{PROJECT}.real_time.vehicle_locations", rows)
+        stages["pubsub_to_bigquery"].items += len(rows)
+        if errors:
+            raise RuntimeError(f"vehicle_locations insert failed: {errors[:3]}")
+
+        # 4) Incident reports
+        reports = load_service(os.path.join(FUNCTIONS_DIR, "process_reports "), "bench_process_reports", {
+            "PROCESSED_BUCKET": INCIDENTS_BUCKET, "BQ_TABLE": f"{PROJECT}.real_time.incidents",
+        })
+        with stages["process_reports"].measure(items=args.reports):
+            body, status = reports.handler(None)
+        if status != 200:
+            raise RuntimeError(f"process_reports: {body}")
+        for blob in reports.storage_client.bucket(INCIDENTS_BUCKET).list_blobs():
+            if blob.name.endswith(".txt"):
+                with stages["process_reports.parse_blob"].measure():
+                    reports.parse_txt_blob(blob)
+
+        # 5) Integration
+        integrator_dir = os.path.join(FUNCTIONS_DIR, "integrator_fn ")
+        integrator = load_service(integrator_dir, "bench_integrator_fn", {
+            "BQ_PROJECT": PROJECT, "INTEGRATED_TABLE": f"{PROJECT}.real_time.integrated",
+        })
+        with cwd(integrator_dir), stages["integrator_fn"].measure(items=0):
+            body, status = integrator.handler(None)
+        if status != 200:
+            raise RuntimeError(f"integrator_fn: {body}")
+        integrated = standins.bigquery.count_rows(f"{PROJECT}.real_time.integrated")
+        if not integrated:
+            print("[WARN] integration produced no rows; later stages have nothing to index or search")
+        stages["integrator_fn"].items += integrated
+
+        # 6) Indexing
+        indexer = load_service(os.path.join(FUNCTIONS_DIR, "es_indexer_fn "), "bench_es_indexer_fn", es_env)
+        with stages["es_indexer_fn"].measure(items=integrated):
+            body, status = indexer.handler(None)
+        if status != 200:
+            raise RuntimeError(f"es_indexer_fn: {body}")
+
+        # 7) Search
+        api = load_service(SEARCH_API_DIR, "bench_search_api", es_env)
+        route_ids = [str(r) for r in publisher.ROUTES]
+        for stage, fmt in (("search", None), ("search.columnar", "columnar")):
+            payload = 0
+            for _ in range(args.queries):
+                params = {"size": rng.choice((25, 50, 100)), "format_": fmt}
+                if rng.random() < 0.7:
+                    params["route_id"] = rng.choice(route_ids)
+                if rng.random() < 0.3:
+                    params["min_delay"] = 0
+                with stages[stage].measure():
+                    resp = call_endpoint(api.search, **params)
+                payload += len(resp.body)
+            stages[stage].extra["avg_response_bytes"] = payload / args.queries
+
+    if args.memory:
+        tracemalloc.stop()
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {name: s.summary() for name, s in stages.items()}
+
+
+# ------------------------------------------------------------------------------
+# Reporting
+# ------------------------------------------------------------------------------
+
+def previous_record(history_path: str, scale: dict, revision: str):
+    if not os.path.isfile(history_path):
+        return None
+    match = None
+    with open(history_path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["scale"] == scale and record["revision"] != revision:
+                match = record
+    return match
+
+
+def print_report(results: dict, baseline) -> None:
+    header = f"{'stage':<28}{'calls':>7}{'items/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak MB':>9}"
+    if baseline:
+        header += f"   vs {baseline['revision']} (p50)"
+    print(header)
+    for name, r in results.items():
+        line = (f"{name:<28}{r['calls']:>7}{r['items_per_sec']:>12.1f}{r['p50_ms']:>10.2f}"
+                f"{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+        line += f"{r['peak_mem_mb']:>9.1f}" if r["peak_mem_mb"] is not None else f"{'-':>9}"
+        old = baseline and baseline["stages"].get(name)
+        if old and old["p50_ms"]:
+            line += f"   {(r['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100:+7.1f}%"
+        print(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local end-to-end benchmark of the transit pipeline")
+    parser.add_argument("--routes", type=int, default=50, help="routes taken from the GTFS feed")
+    parser.add_argument("--trips-per-route", type=int, default=4)
+    parser.add_argument("--stops-per-trip", type=int, default=20,
+                        help="stops per synthesized trip (only when stop_times.txt is an LFS pointer)")
+    parser.add_argument("--batches", type=int, default=10, help="publish rounds per iteration")
+    parser.add_argument("--reports", type=int, default=100, help="incident blobs to process")
+    parser.add_argument("--queries", type=int, default=200, help="/search calls per format")
+    parser.add_argument("--iterations", type=int, default=3, help="pipeline runs")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--es-url", help="use a real Elasticsearch instead of the in-memory stand-in")
+    parser.add_argument("--es-api-key")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="skip tracemalloc (it slows every stage down)")
+    parser.add_argument("--workdir", help="keep the local buckets here instead of a temp dir")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON-lines file results are appended to")
+    parser.add_argument("--json", dest="json_path", help="also write this run's results to this file")
+    args = parser.parse_args()
+
+    scale = {k: getattr(args, k) for k in (
+        "routes", "trips_per_route", "stops_per_trip", "batches", "reports", "queries", "iterations")}
+    scale["es"] = "real" if args.es_url else "stand-in"
+    scale["memory"] = args.memory
+    revision = git_revision()
+
+    results = run(args)
+    print_report(results, previous_record(args.history, scale, revision))
+
+    record = {
+        "revision":  revision,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python":    platform.python_version(),
+        "scale":     scale,
+        "stages":    results,
+    }
+    if args.history:
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+# benchmarks/standins/__init__.py
+#
+# Local stand-ins for the GCP and Elasticsearch clients the services use.
+# install() registers them in sys.modules under the real import names, so the
+# unmodified service modules pick them up when imported afterwards.
+
+import importlib
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import sys
+import types
+
+from . import bigquery, es, gcs, pubsub, secretmanager
+
+
+def _ensure_package(name: str) -> types.ModuleType:
+    module = sys.modules.get(name)
+    if module is None:
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            pass
+        module = types.ModuleType(name)
+        module.__path__ = []
+        sys.modules[name] = module
+        parent, _, child = name.rpartition(".")
+        if parent:
+            setattr(_ensure_package(parent), child, module)
+    return module
+
+
+def _register(name: str, module) -> None:
+    sys.modules[name] = module
+    parent, _, child = name.rpartition(".")
+    setattr(_ensure_package(parent), child, module)
+
+
+def install(gcs_root: str, fake_es: bool = True) -> None:
+    """
+    Points google.cloud.{storage,pubsub_v1,bigquery} at the stand-ins, with
+    buckets under gcs_root. With fake_es, elasticsearch is replaced by the
+    in-memory stand-in; otherwise the real client is left in place.
+    """
+    gcs.ROOT = gcs_root
+    _register("google.cloud.storage", gcs)
+    _register("google.cloud.pubsub_v1", pubsub)
+    _register("google.cloud.bigquery", bigquery)
+
+    if fake_es:
+        es_module = types.ModuleType("elasticsearch")
+        es_module.Elasticsearch = es.Elasticsearch
+        es_module.ElasticsearchException = es.ElasticsearchException
+        es_module.helpers = es.helpers
+        sys.modules["elasticsearch"] = es_module
+        sys.modules["elasticsearch.helpers"] = es.helpers
+
+
+class _PatchingFinder(importlib.abc.MetaPathFinder):
+    """
+    Imports the real module, then overwrites some of its attributes.
+    """
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname != self.name:
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path)
+        if spec is None or spec.loader is None:
+            return None
+        exec_module = spec.loader.exec_module
+
+        def patched(module):
+            exec_module(module)
+            for attr, value in self.attrs.items():
+                setattr(module, attr, value)
+
+        spec.loader.exec_module = patched
+        return spec
+
+
+def patch_import(name: str, fallback, **attrs) -> None:
+    """
+    Swaps only the given client classes of module `name`, keeping the real
+    import, and its import cost, when the package is installed. This keeps
+    cold-start timings comparable. Without the package, `fallback` is
+    registered under `name` instead.
+    """
+    try:
+        installed = importlib.util.find_spec(name) is not None
+    except ImportError:
+        installed = False
+    if installed:
+        sys.meta_path.insert(0, _PatchingFinder(name, attrs))
+    else:
+        _register(name, fallback)
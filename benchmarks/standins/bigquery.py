@@ -0,0 +1,276 @@
+# benchmarks/standins/bigquery.py
+#
+# SQLite-backed stand-in for google.cloud.bigquery. Queries are rewritten
+# from the BigQuery dialect into SQLite with a handful of regexes plus a few
+# user-defined functions -- enough for the SQL this repo actually runs, not a
+# general translator.
+#
+# Tables are addressed as "dataset__table" (the project is dropped).
+# TIMESTAMP and DATETIME columns are both stored as "YYYY-MM-DD HH:MM:SS.ffffff"
+# UTC text, which sorts and compares correctly and is turned back into
+# datetimes in results. SQLite has no column types, so comparing a DATETIME
+# with a TIMESTAMP is not caught here the way BigQuery rejects it.
+
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+_TS_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+_TS_RE = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{6}$")
+_SQL_TYPES = {"STRING": "TEXT", "INT64": "INTEGER", "FLOAT64": "REAL", "TIMESTAMP": "TEXT", "DATETIME": "TEXT"}
+_TIME_TYPES = ("TIMESTAMP", "DATETIME")
+_UNITS = {"SECOND": 1, "MINUTE": 60, "HOUR": 3600, "DAY": 86400}
+
+_lock = threading.RLock()
+_conn = None
+_schemas = {}   # sqlite table name -> {column: bigquery type}
+
+
+# ------------------------------------------------------------------------------
+# SQL functions
+# ------------------------------------------------------------------------------
+
+def _parse_ts(value) -> datetime:
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, (int, float)):
+        dt = datetime.fromtimestamp(value, tz=timezone.utc)
+    else:
+        text = str(value).strip().replace("Z", "+00:00")
+        dt = datetime.fromisoformat(text)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def to_ts(value):
+    if value is None:
+        return None
+    return _parse_ts(value).strftime(_TS_FORMAT)
+
+
+def _interval(spec: str) -> timedelta:
+    amount, unit = spec.split()
+    return timedelta(seconds=int(amount) * _UNITS[unit.upper()])
+
+
+def _ts_add(value, spec):
+    return None if value is None else to_ts(_parse_ts(value) + _interval(spec))
+
+
+def _ts_sub(value, spec):
+    return None if value is None else to_ts(_parse_ts(value) - _interval(spec))
+
+
+def _ts_diff(a, b, unit):
+    if a is None or b is None:
+        return None
+    return int((_parse_ts(a) - _parse_ts(b)).total_seconds() // _UNITS[unit.upper()])
+
+
+def _date_add(value, spec):
+    if value is None:
+        return None
+    return (_parse_ts(value) + _interval(spec)).date().isoformat()
+
+
+def _split_part(value, sep, index):
+    if value is None:
+        return None
+    return str(value).split(sep)[index]
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.create_function("TIMESTAMP", 1, to_ts, deterministic=True)
+    # Replaces SQLite's own datetime() for the one-argument form
+    conn.create_function("DATETIME", 1, to_ts, deterministic=True)
+    conn.create_function("TIMESTAMP_ADD", 2, _ts_add, deterministic=True)
+    conn.create_function("TIMESTAMP_SUB", 2, _ts_sub, deterministic=True)
+    conn.create_function("TIMESTAMP_DIFF", 3, _ts_diff, deterministic=True)
+    conn.create_function("DATE_ADD", 2, _date_add, deterministic=True)
+    conn.create_function("SPLIT_PART", 3, _split_part, deterministic=True)
+    return conn
+
+
+def connection() -> sqlite3.Connection:
+    global _conn
+    with _lock:
+        if _conn is None:
+            _conn = _connect()
+        return _conn
+
+
+# ------------------------------------------------------------------------------
+# Dialect translation
+# ------------------------------------------------------------------------------
+
+def table_name(table_id: str) -> str:
+    # "project.dataset.table" / "dataset.table" -> "dataset__table"
+    parts = table_id.strip("`").split(".")
+    return "__".join(parts[-2:])
+
+
+_REWRITES = [
+    # Comments first: they may contain quotes or semicolons
+    (re.compile(r"--[^\n]*"), lambda m: ""),
+    (re.compile(r"`([^`]+)`"), lambda m: table_name(m.group(1))),
+    (re.compile(r'SPLIT\(([^,]+),\s*"([^"]*)"\)\[OFFSET\((\d+)\)\]', re.I),
+     lambda m: f"SPLIT_PART({m.group(1)}, '{m.group(2)}', {m.group(3)})"),
+    (re.compile(r"INTERVAL\s+(\d+)\s+(SECOND|MINUTE|HOUR|DAY)\b", re.I),
+     lambda m: f"'{m.group(1)} {m.group(2)}'"),
+    (re.compile(r",\s*(SECOND|MINUTE|HOUR|DAY)\s*\)", re.I), lambda m: f", '{m.group(1)}')"),
+    (re.compile(r"\bCURRENT_(DATE|TIMESTAMP)\(\)", re.I), lambda m: f"CURRENT_{m.group(1).upper()}"),
+    (re.compile(r'"([^"]*)"'), lambda m: f"'{m.group(1)}'"),
+]
+
+# Captures the table name; PARTITION BY / CLUSTER BY / OPTIONS clauses
+# between it and AS have no SQLite equivalent and are dropped
+_CREATE_OR_REPLACE = re.compile(r"^\s*CREATE\s+OR\s+REPLACE\s+TABLE\s+(\w+)(.*?)\bAS\b", re.I | re.S)
+
+_CREATE_AS = re.compile(r"^\s*CREATE\s+TABLE\s+\w+\s+AS\b", re.I)
+
+
+def translate(sql: str) -> list:
+    """
+    Rewrites BigQuery SQL into a list of SQLite statements.
+    """
+    for pattern, repl in _REWRITES:
+        sql = pattern.sub(repl, sql)
+    statements = []
+    for stmt in sql.split(";"):
+        if not stmt.strip():
+            continue
+        m = _CREATE_OR_REPLACE.match(stmt)
+        if m:
+            statements.append(f"DROP TABLE IF EXISTS {m.group(1)}")
+            stmt = _CREATE_OR_REPLACE.sub(f"CREATE TABLE {m.group(1)} AS", stmt, count=1)
+        statements.append(stmt)
+    return statements
+
+
+# ------------------------------------------------------------------------------
+# Client API
+# ------------------------------------------------------------------------------
+
+class Row:
+    """
+    Mimics bigquery.Row: attribute, key and index access.
+    """
+
+    def __init__(self, keys, values):
+        self._keys = keys
+        self._values = [
+            _parse_ts(v) if isinstance(v, str) and _TS_RE.match(v) else v
+            for v in values
+        ]
+        self._index = {k: i for i, k in enumerate(keys)}
+
+    def __getattr__(self, name):
+        try:
+            return self._values[self._index[name]]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._values[self._index[key]]
+        return self._values[key]
+
+    def keys(self):
+        return list(self._keys)
+
+    def values(self):
+        return list(self._values)
+
+    def items(self):
+        return list(zip(self._keys, self._values))
+
+
+class QueryJobConfig:
+    def __init__(self, dry_run: bool = False, use_query_cache: bool = True, **kwargs):
+        self.dry_run = dry_run
+        self.use_query_cache = use_query_cache
+
+
+class QueryJob:
+    def __init__(self, sql: str, dry_run: bool = False):
+        self.query = sql
+        self.num_dml_affected_rows = None
+        # SQLite has no byte accounting; a dry run only checks the SQL parses
+        self.total_bytes_processed = 0
+        self._rows = []
+        if dry_run:
+            with _lock:
+                for stmt in translate(sql):
+                    if stmt.lstrip().upper().startswith("DROP"):
+                        continue
+                    # The target table may already exist; check just the SELECT
+                    m = _CREATE_AS.match(stmt)
+                    connection().execute(f"EXPLAIN {stmt[m.end():] if m else stmt}")
+            return
+        with _lock:
+            cursor = connection().cursor()
+            for stmt in translate(sql):
+                cursor.execute(stmt)
+                if cursor.description:
+                    keys = [d[0] for d in cursor.description]
+                    self._rows = [Row(keys, r) for r in cursor.fetchall()]
+            connection().commit()
+
+    def result(self, timeout=None):
+        return list(self._rows)
+
+
+class Client:
+    def __init__(self, project: str = None, *args, **kwargs):
+        self.project = project or "local"
+
+    def query(self, sql: str, job_config=None) -> QueryJob:
+        return QueryJob(sql, dry_run=bool(getattr(job_config, "dry_run", False)))
+
+    def insert_rows_json(self, table_id: str, rows: list) -> list:
+        name = table_name(table_id)
+        schema = _schemas.get(name)
+        if schema is None:
+            return [{"index": 0, "errors": [{"message": f"Not found: Table {table_id}"}]}]
+        errors = []
+        columns = list(schema)
+        values = []
+        for i, row in enumerate(rows):
+            unknown = set(row) - set(columns)
+            if unknown:
+                errors.append({"index": i, "errors": [{"message": f"no such field: {sorted(unknown)}"}]})
+                continue
+            values.append([
+                to_ts(row.get(c)) if schema[c] in _TIME_TYPES else row.get(c)
+                for c in columns
+            ])
+        if errors:
+            return errors
+        placeholders = ", ".join("?" for _ in columns)
+        with _lock:
+            connection().executemany(
+                f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({placeholders})", values
+            )
+            connection().commit()
+        return []
+
+
+def create_table(table_id: str, schema: dict) -> None:
+    """
+    Creates (or recreates) a table from {column: bigquery type}.
+    """
+    name = table_name(table_id)
+    cols = ", ".join(f"{c} {_SQL_TYPES[t]}" for c, t in schema.items())
+    with _lock:
+        connection().execute(f"DROP TABLE IF EXISTS {name}")
+        connection().execute(f"CREATE TABLE {name} ({cols})")
+        connection().commit()
+        _schemas[name] = dict(schema)
+
+
+def count_rows(table_id: str) -> int:
+    with _lock:
+        return connection().execute(f"SELECT COUNT(1) FROM {table_name(table_id)}").fetchone()[0]
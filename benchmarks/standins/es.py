@@ -0,0 +1,213 @@
+# benchmarks/standins/es.py
+#
+# In-memory stand-in for the elasticsearch 7.x client. Supports the subset
+# this repo uses: bulk indexing through helpers.bulk, and bool queries built
+# from match_all / term / prefix / range / geo_bounding_box with size, sort,
+# collapse, _source and filter_path. The only aggregation is a top-level max.
+#
+# Dates are kept as the ISO strings the indexer writes; a range or max on
+# them works in epoch millis the way ES does for date fields.
+
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+INDICES = defaultdict(dict)     # index -> {_id: _source}
+
+
+class ElasticsearchException(Exception):
+    pass
+
+
+# ------------------------------------------------------------------------------
+# Query evaluation
+# ------------------------------------------------------------------------------
+
+def _epoch_millis(value):
+    if isinstance(value, str):
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return value
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp() * 1000
+    return value
+
+
+def _compare(value, op, bound) -> bool:
+    if value is None:
+        return False
+    if isinstance(bound, (int, float)):
+        value = _epoch_millis(value)
+    if isinstance(value, str) or isinstance(bound, str):
+        value, bound = str(value), str(bound)
+    return {
+        "gte": value >= bound,
+        "gt":  value > bound,
+        "lte": value <= bound,
+        "lt":  value < bound,
+    }[op]
+
+
+def _matches(doc: dict, clause: dict) -> bool:
+    (kind, spec), = clause.items()
+    if kind == "match_all":
+        return True
+    if kind == "bool":
+        return all(_matches(doc, c) for c in spec.get("must", []) + spec.get("filter", []))
+    if kind == "term":
+        (field, value), = spec.items()
+        if isinstance(value, dict):
+            value = value["value"]
+        return doc.get(field) == value
+    if kind == "prefix":
+        (field, value), = spec.items()
+        if isinstance(value, dict):
+            value = value["value"]
+        return str(doc.get(field, "")).startswith(value)
+    if kind == "range":
+        (field, bounds), = spec.items()
+        return all(
+            _compare(doc.get(field), op, b) for op, b in bounds.items() if op != "format"
+        )
+    if kind == "geo_bounding_box":
+        (field, box), = spec.items()
+        loc = doc.get(field) or {}
+        return (
+            box["bottom_right"]["lat"] <= loc.get("lat", 999) <= box["top_left"]["lat"]
+            and box["top_left"]["lon"] <= loc.get("lon", 999) <= box["bottom_right"]["lon"]
+        )
+    raise ElasticsearchException(f"unsupported query clause: {kind}")
+
+
+def _filter_path(obj, paths):
+    """
+    Keeps only the dotted paths given; like ES, empty branches are dropped.
+    """
+    if not paths:
+        return obj
+    if isinstance(obj, list):
+        kept = [_filter_path(item, paths) for item in obj]
+        return [k for k in kept if k not in (None, {}, [])]
+    if not isinstance(obj, dict):
+        return obj
+    out = {}
+    for key, value in obj.items():
+        if key in paths:
+            out[key] = value
+            continue
+        sub = [p[len(key) + 1:] for p in paths if p.startswith(key + ".")]
+        if sub:
+            kept = _filter_path(value, sub)
+            if kept not in (None, {}, []):
+                out[key] = kept
+    return out
+
+
+# ------------------------------------------------------------------------------
+# Client API
+# ------------------------------------------------------------------------------
+
+def _aggregate(docs: list, aggs: dict) -> dict:
+    out = {}
+    for name, spec in aggs.items():
+        (kind, params), = ((k, v) for k, v in spec.items() if k not in ("aggs", "aggregations"))
+        if kind != "max":
+            raise ElasticsearchException(f"unsupported aggregation: {kind}")
+        values = [_epoch_millis(d.get(params["field"])) for d in docs]
+        values = [v for v in values if isinstance(v, (int, float))]
+        out[name] = {"value": max(values) if values else None}
+    return out
+
+
+def _sort(matched: list, sort: list) -> list:
+    # Stable sorts applied last key first give the multi-key order
+    for key in reversed(sort):
+        (field, order), = key.items() if isinstance(key, dict) else ((key, "asc"),)
+        if isinstance(order, dict):
+            order = order.get("order", "asc")
+        present = [m for m in matched if m[1].get(field) is not None]
+        missing = [m for m in matched if m[1].get(field) is None]
+        present.sort(key=lambda m: _epoch_millis(m[1][field]), reverse=order == "desc")
+        matched = present + missing
+    return matched
+
+
+def _collapse(matched: list, field: str) -> list:
+    seen = set()
+    kept = []
+    for doc_id, doc in matched:
+        value = doc.get(field)
+        if value not in seen:
+            seen.add(value)
+            kept.append((doc_id, doc))
+    return kept
+
+
+class _Indices:
+    def create(self, index: str, body: dict = None, ignore=None, **kwargs) -> dict:
+        if index in INDICES:
+            if 400 in (ignore if isinstance(ignore, (list, tuple)) else (ignore,)):
+                return {"error": {"type": "resource_already_exists_exception"}, "status": 400}
+            raise ElasticsearchException(f"index [{index}] already exists")
+        INDICES[index] = {}
+        return {"acknowledged": True, "index": index}
+
+
+class Elasticsearch:
+    def __init__(self, hosts=None, **kwargs):
+        self.indices = _Indices()
+
+    def ping(self, **kwargs) -> bool:
+        return True
+
+    def index(self, index: str, body: dict, id: str = None, **kwargs) -> dict:
+        doc_id = id or str(len(INDICES[index]) + 1)
+        INDICES[index][doc_id] = body
+        return {"_id": doc_id, "result": "created"}
+
+    def search(self, index: str, body: dict, filter_path=None, **kwargs) -> dict:
+        start = time.perf_counter()
+        query = body.get("query", {"match_all": {}})
+        matched = [(i, d) for i, d in INDICES[index].items() if _matches(d, query)]
+        total = len(matched)
+        aggs = body.get("aggs") or body.get("aggregations")
+        aggregations = _aggregate([d for _, d in matched], aggs) if aggs else None
+        if "sort" in body:
+            matched = _sort(matched, body["sort"])
+        if "collapse" in body:
+            matched = _collapse(matched, body["collapse"]["field"])
+        fields = body.get("_source")
+        hits = []
+        for doc_id, doc in matched[:body.get("size", 10)]:
+            source = {f: doc[f] for f in fields if f in doc} if fields else doc
+            hits.append({"_index": index, "_id": doc_id, "_score": 1.0, "_source": source})
+        resp = {
+            "took": int((time.perf_counter() - start) * 1000),
+            "timed_out": False,
+            "hits": {"total": {"value": total, "relation": "eq"}, "hits": hits},
+        }
+        if aggregations is not None:
+            resp["aggregations"] = aggregations
+        if isinstance(filter_path, str):
+            filter_path = filter_path.split(",")
+        return _filter_path(resp, filter_path)
+
+
+class helpers:
+    """
+    Stands in for the elasticsearch.helpers module.
+    """
+
+    @staticmethod
+    def bulk(client: Elasticsearch, actions, **kwargs):
+        success = 0
+        for action in actions:
+            client.index(index=action["_index"], body=action["_source"], id=action.get("_id"))
+            success += 1
+        return success, []
+
+
+def reset() -> None:
+    INDICES.clear()
@@ -0,0 +1,74 @@
+# benchmarks/standins/gcs.py
+#
+# Filesystem-backed stand-in for google.cloud.storage: bucket "b" lives in
+# <ROOT>/b and blob "x/y.txt" in <ROOT>/b/x/y.txt.
+
+import os
+from datetime import datetime, timezone
+
+ROOT = None
+
+
+class Blob:
+    def __init__(self, bucket: "Bucket", name: str):
+        self.bucket = bucket
+        self.name = name
+
+    @property
+    def _path(self) -> str:
+        return os.path.join(self.bucket._path, *self.name.split("/"))
+
+    @property
+    def time_created(self) -> datetime:
+        return datetime.fromtimestamp(os.path.getmtime(self._path), tz=timezone.utc)
+
+    def exists(self) -> bool:
+        return os.path.isfile(self._path)
+
+    def download_as_text(self, encoding: str = "utf-8") -> str:
+        with open(self._path, encoding=encoding) as f:
+            return f.read()
+
+    def download_as_bytes(self) -> bytes:
+        with open(self._path, "rb") as f:
+            return f.read()
+
+    def upload_from_string(self, data, content_type: str = None) -> None:
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        with open(self._path, "wb") as f:
+            f.write(data)
+
+
+class Bucket:
+    def __init__(self, name: str):
+        self.name = name
+
+    @property
+    def _path(self) -> str:
+        return os.path.join(ROOT, self.name)
+
+    def blob(self, name: str) -> Blob:
+        return Blob(self, name)
+
+    def list_blobs(self, prefix: str = ""):
+        if not os.path.isdir(self._path):
+            return []
+        names = []
+        for dirpath, _, filenames in os.walk(self._path):
+            for fn in filenames:
+                rel = os.path.relpath(os.path.join(dirpath, fn), self._path)
+                name = rel.replace(os.sep, "/")
+                if name.startswith(prefix):
+                    names.append(name)
+        return [Blob(self, n) for n in sorted(names)]
+
+
+class Client:
+    def __init__(self, *args, **kwargs):
+        if ROOT is None:
+            raise RuntimeError("standins.gcs.ROOT is not set; call standins.install() first")
+
+    def bucket(self, name: str) -> Bucket:
+        return Bucket(name)
@@ -0,0 +1,42 @@
+# benchmarks/standins/pubsub.py
+#
+# In-memory stand-in for google.cloud.pubsub_v1. Published messages are kept
+# per topic in TOPICS until a consumer drains them.
+
+from collections import defaultdict, deque
+from itertools import count
+
+TOPICS = defaultdict(deque)
+_ids = count(1)
+
+
+class _Future:
+    def __init__(self, message_id: str):
+        self._message_id = message_id
+
+    def result(self, timeout=None) -> str:
+        return self._message_id
+
+
+class PublisherClient:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @staticmethod
+    def topic_path(project: str, topic: str) -> str:
+        return f"projects/{project}/topics/{topic}"
+
+    def publish(self, topic: str, data: bytes, **attrs) -> _Future:
+        message_id = str(next(_ids))
+        TOPICS[topic].append(data)
+        return _Future(message_id)
+
+
+def drain(topic: str) -> list:
+    """
+    Removes and returns every message currently queued on the topic.
+    """
+    queue = TOPICS[topic]
+    messages = list(queue)
+    queue.clear()
+    return messages
@@ -0,0 +1,26 @@
+# benchmarks/standins/secretmanager.py
+#
+# Stand-in for google.cloud.secretmanager. Secrets resolve from the same env
+# names startup.py checks ("elastic-endpoint" -> ELASTIC_ENDPOINT), after an
+# optional simulated round trip of LATENCY_SEC per call.
+
+import os
+import time
+from types import SimpleNamespace
+
+LATENCY_SEC = 0.0
+
+
+class SecretManagerServiceClient:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def access_secret_version(self, name: str = None, request: dict = None, **kwargs):
+        # "projects/<project>/secrets/<secret>/versions/<version>"
+        name = name or request["name"]
+        secret = name.split("/")[3]
+        value = os.environ.get(secret.upper().replace("-", "_"))
+        if value is None:
+            raise KeyError(f"stand-in has no value for secret {secret!r}")
+        time.sleep(LATENCY_SEC)
+        return SimpleNamespace(payload=SimpleNamespace(data=value.encode("UTF-8")))
@@ -1,47 +1,105 @@
-import os
 import json
-from datetime import datetime
-from google.cloud import bigquery, secretmanager
+from datetime import datetime, timedelta
 from elasticsearch import Elasticsearch, helpers
 
+import instrumentation
+import startup
+
 # ------------------------------------------------------------------------------
-# 1) Helper to fetch a Secret Manager secret (version “latest”)
+# 1) Lazily-built clients (reused across invocations)
 # ------------------------------------------------------------------------------
+# ES_ENDPOINT / ES_API_KEY come from the env (ELASTIC_ENDPOINT,
+# ELASTIC_API_KEY), $SECRETS_DIR, or Secret Manager; both secrets are fetched
+# in parallel.
+
+def _build_es() -> Elasticsearch:
+    secrets = startup.get_secrets("elastic-endpoint", "elastic-api-key")
+    return Elasticsearch(
+        [secrets["elastic-endpoint"]],
+        api_key=secrets["elastic-api-key"]    # directly pass the single Base64-encoded string
+    )
+
+
+def _build_bq():
+    # Imported here: google-cloud-bigquery is slow to import
+    from google.cloud import bigquery
+    return bigquery.Client()
 
-def access_secret(secret_name: str) -> str:
-    """
-    Reads the latest version of the secret from Secret Manager.
-    Expects the environment variable GCP_PROJECT to be set.
-    """
-    project_id = os.getenv("GCP_PROJECT")
-    client = secretmanager.SecretManagerServiceClient()
-    name = f"projects/{project_id}/secrets/{secret_name}/versions/latest"
-    response = client.access_secret_version(name=name)
-    return response.payload.data.decode("UTF-8")
+
+get_es = startup.lazy(_build_es)
+get_bq = startup.lazy(_build_bq)
 
 
 # ------------------------------------------------------------------------------
-# 2) On cold start, fetch ES_ENDPOINT and ES_API_KEY from Secret Manager
+# 1b) Index mapping
 # ------------------------------------------------------------------------------
+# Created with the index if it does not exist yet; an existing index keeps its
+# mapping. The search API's /tiles endpoint collapses and counts distinct
+# values on vehicle_id, which needs it as keyword (not dynamic-mapped text),
+# and filters on location as a geo_point. An index created before this
+# mapping must be reindexed into one that has it.
+
+ES_INDEX = "transit-integrated"
+
+INDEX_MAPPING = {
+    "mappings": {
+        "properties": {
+            "vehicle_id":     {"type": "keyword"},
+            "ping_ts":        {"type": "date"},
+            "stop_id":        {"type": "keyword"},
+            "schedu_ts":      {"type": "date"},
+            "delay_sec":      {"type": "integer"},
+            "location":       {"type": "geo_point"},
+            "incident_count": {"type": "integer"}
+        }
+    }
+}
+
 
-ES_ENDPOINT = access_secret("elastic-endpoint")
-ES_API_KEY   = access_secret("elastic-api-key")
+def _create_index() -> bool:
+    # 400 = resource_already_exists_exception
+    get_es().indices.create(index=ES_INDEX, body=INDEX_MAPPING, ignore=400)
+    return True
 
-# Initialize Elasticsearch client once (reused across invocations)
-es = Elasticsearch(
-    [ES_ENDPOINT],
-    api_key=ES_API_KEY    # directly pass the single Base64-encoded string
-)
 
-# Initialize BigQuery client once
-bq_client = bigquery.Client()
+ensure_index = startup.lazy(_create_index)
 
 
 # ------------------------------------------------------------------------------
-# 3) Cloud Function entrypoint
+# 2) On cold start, build both clients in the background so that the work
+#    overlaps with the runtime finishing its own startup
+# ------------------------------------------------------------------------------
+
+startup.warm_up(get_bq, lambda: get_es().ping())
+
+
+# ------------------------------------------------------------------------------
+# 3) Metrics
+# ------------------------------------------------------------------------------
+
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+BQ_FETCH_SECONDS = instrumentation.Histogram(
+    "es_indexer_bigquery_fetch_seconds", "BigQuery query + row fetch time.", buckets=SLOW_BUCKETS)
+BULK_SECONDS = instrumentation.Histogram(
+    "es_indexer_bulk_seconds", "Elasticsearch bulk indexing time.", buckets=SLOW_BUCKETS)
+DOCUMENTS = instrumentation.Counter(
+    "es_indexer_documents_total", "Documents successfully bulk-indexed.")
+
+
+# ------------------------------------------------------------------------------
+# 4) Cloud Function entrypoint
 # ------------------------------------------------------------------------------
 
 def handler(request):
+    instrumentation.start_request(getattr(request, "headers", None))
+    try:
+        return index_recent_rows()
+    finally:
+        instrumentation.log_metrics()
+
+
+def index_recent_rows():
     """
     Cloud Function that:
     1) Queries BigQuery for the last 6 hours of rows in real_time.integrated,
@@ -51,7 +109,7 @@ def handler(request):
 
     # 3.A. Define the timestamp cutoff = “now − 6 hours”
     now = datetime.utcnow()
-    six_hours_ago = now.replace(microsecond=0)  # drop micros for readability
+    six_hours_ago = (now - timedelta(hours=6)).replace(microsecond=0)  # drop micros for readability
     six_hours_ago_ts = six_hours_ago.isoformat() + "Z"  # e.g. "2025-06-02T12:34:00Z"
 
     # 3.B. Build & run the BigQuery query
@@ -60,7 +118,7 @@ def handler(request):
       vehicle_id,
       ping_ts,
       stop_id,
-      schedu_ts,
+      sched_ts AS schedu_ts,
       delay_sec,
       lat,
       lon,
@@ -73,8 +131,9 @@ def handler(request):
 
     # Use a default timeout of 60 seconds (6-hour window is small enough)
     try:
-        query_job = bq_client.query(query)
-        rows = list(query_job.result())  # fetch all matching rows
+        with instrumentation.span("es_indexer.bigquery_fetch", BQ_FETCH_SECONDS):
+            query_job = get_bq().query(query)
+            rows = list(query_job.result())  # fetch all matching rows
     except Exception as e:
         print(f"[ERROR] BigQuery query failed: {e}")
         return (f"BigQuery query error: {str(e)}", 500)
@@ -103,18 +162,21 @@ def handler(request):
         }
 
         actions.append({
-            "_index": "transit-integrated",
+            "_index": ES_INDEX,
             "_id":    doc_id,
             "_source": doc_body
         })
 
     # 3.D. Bulk-insert into Elasticsearch
     try:
-        success, _ = helpers.bulk(es, actions)
+        ensure_index()
+        with instrumentation.span("es_indexer.bulk", BULK_SECONDS):
+            success, _ = helpers.bulk(get_es(), actions)
         # success = number of documents indexed
+        DOCUMENTS.inc(success)
     except Exception as e:
         print(f"[ERROR] Elasticsearch bulk insert failed: {e}")
         return (f"Elasticsearch error: {str(e)}", 500)
 
-    print(f"Indexed {success} documents into transit-integrated.")
+    print(f"Indexed {success} documents into {ES_INDEX}.")
     return (f"Indexed {success} documents.", 200)
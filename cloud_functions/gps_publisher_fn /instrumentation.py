@@ -0,0 +1,198 @@
+# shared/instrumentation.py
+#
+# Minimal Prometheus-style metrics (counters and histograms rendered in the
+# text exposition format) plus optional span tracing with a per-request ID.
+#
+# Spans are logged as structured JSON lines when TRACE_SPANS=1. Each service
+# is deployed on its own, so shared/sync.py copies this file verbatim next to
+# every main.py that uses it. Edit it here, then run the sync;
+# `python shared/sync.py --check` fails if a copy has drifted.
+
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+TRACE_SPANS = os.getenv("TRACE_SPANS", "0") == "1"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+request_id_var = contextvars.ContextVar("request_id", default=None)
+_span_var = contextvars.ContextVar("span", default=None)
+# What the current request recorded, bound by start_request():
+# {metric name: {label key: counter value or [sum, count]}}
+_invocation_var = contextvars.ContextVar("invocation", default=None)
+
+_lock = threading.Lock()
+_registry = []
+
+
+def _label_str(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[tuple, float] = {}
+        _registry.append(self)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels[n]) for n in self.labels)
+        invocation = _invocation_var.get()
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+            if invocation is not None:
+                values = invocation.setdefault(self.name, {})
+                values[key] = values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_label_str(self.labels, key)} {_fmt(value)}")
+        return lines
+
+    def snapshot(self) -> dict:
+        return {",".join(k) or "": v for k, v in self._values.items()}
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._values: Dict[tuple, list] = {}   # key -> [bucket counts..., sum, count]
+        _registry.append(self)
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[n]) for n in self.labels)
+        invocation = _invocation_var.get()
+        with _lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+            if invocation is not None:
+                totals = invocation.setdefault(self.name, {}).setdefault(key, [0.0, 0])
+                totals[0] += value
+                totals[1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, state in sorted(self._values.items()):
+            for bound, n in zip(self.buckets, state):
+                le = f'le="{_fmt(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_str(self.labels, key, le)} {n}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {_fmt(state[-2])}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {state[-1]}")
+        return lines
+
+    def snapshot(self) -> dict:
+        return {
+            ",".join(k) or "": {"count": s[-1], "sum": round(s[-2], 6)}
+            for k, s in self._values.items()
+        }
+
+
+def render() -> str:
+    """
+    All registered metrics in the Prometheus text exposition format.
+    """
+    with _lock:
+        lines = [line for metric in _registry for line in metric.render()]
+    return "\n".join(lines) + "\n"
+
+
+def log_metrics() -> None:
+    """
+    Prints what the current invocation recorded since start_request() as one
+    structured log line; used by the Cloud Functions, which have no /metrics
+    endpoint to scrape.
+
+    The totals live in a contextvar rather than the process-wide registry, so
+    concurrent invocations on one instance (gen2 concurrency > 1) each log
+    only their own numbers under their own request_id, and render() stays
+    cumulative. Metrics recorded on threads that did not inherit the
+    request's context count towards the registry only.
+    """
+    invocation = _invocation_var.get() or {}
+    with _lock:
+        snapshot = {
+            name: {
+                ",".join(k) or "": (
+                    {"count": v[1], "sum": round(v[0], 6)} if isinstance(v, list) else v
+                )
+                for k, v in values.items()
+            }
+            for name, values in invocation.items()
+        }
+    print(json.dumps({"severity": "INFO", "message": "metrics", "scope": "invocation",
+                      "request_id": request_id_var.get(), "metrics": snapshot}))
+
+
+# ------------------------------------------------------------------------------
+# Request IDs and spans
+# ------------------------------------------------------------------------------
+
+def start_request(headers=None) -> str:
+    """
+    Binds a request ID to the current context: X-Request-ID if the caller
+    sent one, else the trace ID from X-Cloud-Trace-Context, else a new one.
+    Also starts the per-invocation totals that log_metrics() reports.
+    """
+    request_id = None
+    if headers is not None:
+        request_id = headers.get("x-request-id")
+        if not request_id:
+            trace = headers.get("x-cloud-trace-context")
+            request_id = trace.split("/")[0] if trace else None
+    request_id = request_id or uuid.uuid4().hex
+    request_id_var.set(request_id)
+    _invocation_var.set({})
+    return request_id
+
+
+@contextmanager
+def span(name: str, histogram: Optional[Histogram] = None, **labels):
+    """
+    Times the enclosed block, records it in `histogram` if given, and logs it
+    as a span when TRACE_SPANS=1.
+    """
+    parent = _span_var.get()
+    token = _span_var.set(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _span_var.reset(token)
+        if histogram is not None:
+            histogram.observe(elapsed, **labels)
+        if TRACE_SPANS:
+            print(json.dumps({
+                "severity":    "DEBUG",
+                "message":     "span",
+                "span":        name,
+                "parent":      parent,
+                "request_id":  request_id_var.get(),
+                "duration_ms": round(elapsed * 1000, 3),
+                **labels,
+            }))
@@ -7,6 +7,8 @@ from datetime import datetime, timezone
 import pandas as pd
 from google.cloud import pubsub_v1, storage
 
+import instrumentation
+
 
 # Environment variables
 PROJECT_ID = os.environ['L2C_PROJECT_ID']
@@ -23,6 +25,12 @@ topic_path = publisher.topic_path(PROJECT_ID, 'vehicle-locations')
 # Storage client for loading config from GCS
 storage_client = storage.Client()
 
+# Metrics
+PUBLISH_SECONDS = instrumentation.Histogram(
+    "gps_publish_latency_seconds", "Pub/Sub publish latency, until the message ID is returned.")
+MESSAGES = instrumentation.Counter(
+    "gps_messages_published_total", "Pings published to Pub/Sub.")
+
 
 def load_route_bounds(bucket_name: str, blob_path: str) -> pd.DataFrame:
     """
@@ -61,8 +69,10 @@ def run_publisher() -> int:
             'lon': lon
         }
         data = json.dumps(ping).encode('utf-8')
-        future = publisher.publish(topic_path, data)
-        message_id = future.result(timeout=60)
+        with instrumentation.span("gps_publisher.publish", PUBLISH_SECONDS):
+            future = publisher.publish(topic_path, data)
+            message_id = future.result(timeout=60)
+        MESSAGES.inc()
     print(f"[{datetime.now()}] Published {len(ROUTES)} pings, last message ID: {message_id}")
     return message_id 
 
@@ -74,8 +84,12 @@ def run_publisher() -> int:
 
 @functions_framework.http
 def handler(request):
-    start = time.time()
-    while time.time() - start < MAX_RUNTIME:
-        run_publisher()
-        time.sleep(INTERVAL)
-    return ("GPS publishing cycle complete", 200)
+    instrumentation.start_request(getattr(request, "headers", None))
+    try:
+        start = time.time()
+        while time.time() - start < MAX_RUNTIME:
+            run_publisher()
+            time.sleep(INTERVAL)
+        return ("GPS publishing cycle complete", 200)
+    finally:
+        instrumentation.log_metrics()
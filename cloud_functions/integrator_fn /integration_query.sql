@@ -1,5 +1,13 @@
-CREATE OR REPLACE TABLE `cityprogressmobilityl2c.real_time.integrated` AS
+CREATE OR REPLACE TABLE `cityprogressmobilityl2c.real_time.integrated`
+PARTITION BY DATE(ping_ts)
+CLUSTER BY vehicle_id
+AS
 
+-- Source tables are partitioned by day on their event-time column (see
+-- schema.py). Filters compare the bare column against constant bounds of
+-- the column's own type so BigQuery prunes to today's partition; wrapping
+-- the column in DATE() or TIMESTAMP() would defeat that. The ping and
+-- schedule times are DATETIME and are only cast to TIMESTAMP once selected.
 WITH
   pings AS (
     SELECT
@@ -8,14 +16,24 @@ WITH
       lat, lon,
       SPLIT(vehicle_id, "_")[OFFSET(0)] AS route_id
     FROM `cityprogressmobilityl2c.real_time.vehicle_locations`
-    WHERE DATE(timestamp) = CURRENT_DATE()
+    WHERE timestamp >= DATETIME(CURRENT_DATE())
+      AND timestamp <  DATETIME(DATE_ADD(CURRENT_DATE(), INTERVAL 1 DAY))
   ),
   schedule AS (
     SELECT
       route_id, stop_id, stop_name,
       TIMESTAMP(scheduled_time) AS sched_ts
     FROM `cityprogressmobilityl2c.legacy_gtfs.gtfs_summary_norm`
-    WHERE DATE(scheduled_time) = CURRENT_DATE()
+    WHERE scheduled_time >= DATETIME(CURRENT_DATE())
+      AND scheduled_time <  DATETIME(DATE_ADD(CURRENT_DATE(), INTERVAL 1 DAY))
+  ),
+  incidents AS (
+    -- today's incidents plus the 10 minutes before midnight, which the
+    -- earliest pings still look back into
+    SELECT event_time
+    FROM `cityprogressmobilityl2c.real_time.incidents`
+    WHERE event_time >= TIMESTAMP_SUB(TIMESTAMP(CURRENT_DATE()), INTERVAL 10 MINUTE)
+      AND event_time <  TIMESTAMP(DATE_ADD(CURRENT_DATE(), INTERVAL 1 DAY))
   ),
   next_stop AS (
     SELECT
@@ -46,7 +64,7 @@ WITH
     SELECT
       *,
       (SELECT COUNT(1) 
-       FROM `cityprogressmobilityl2c.real_time.incidents` i
+       FROM incidents i
        WHERE
          i.event_time BETWEEN TIMESTAMP_SUB(p.ping_ts, INTERVAL 10 MINUTE)
                          AND p.ping_ts
@@ -2,14 +2,26 @@ import os
 import functions_framework
 from google.cloud import bigquery
 
+from schema import dry_run_bytes
+
 BQ_PROJECT = os.environ['BQ_PROJECT']      # cityprogressmobilityl2c
 INTEGRATED_TABLE = os.environ['INTEGRATED_TABLE']  
 # e.g. "cityprogressmobilityl2c.real_time.integrated"
+# Refuse to run the integration if the dry run says it would scan more than
+# this many bytes (0 = no limit)
+MAX_BYTES_SCANNED = int(os.environ.get('MAX_BYTES_SCANNED', 0))
 
 @functions_framework.http
 def handler(request):
     client = bigquery.Client(project=BQ_PROJECT)
     sql = open("integration_query.sql").read()
+
+    # Dry run first: free, and reports what the partition pruning left to scan
+    scan_bytes = dry_run_bytes(client, sql)
+    print(f"Integration query will scan {scan_bytes} bytes")
+    if MAX_BYTES_SCANNED and scan_bytes > MAX_BYTES_SCANNED:
+        return (f"Integration query would scan {scan_bytes} bytes, over MAX_BYTES_SCANNED={MAX_BYTES_SCANNED}", 500)
+
     job = client.query(sql)  # runs the CREATE OR REPLACE TABLE
     job.result()  # wait for completion
     return (f"Integrated table updated, {job.num_dml_affected_rows} rows upserted", 200)
@@ -0,0 +1,150 @@
+# cloud_functions/integrator_fn/schema.py
+#
+# Table layout for the BigQuery sources of integration_query.sql. Every table
+# is partitioned by day on its event-time column and clustered on the columns
+# the integration joins and filters on, so the query's date-range predicates
+# prune to today's partition instead of scanning the full history.
+#
+# Usage:
+#   python schema.py --project cityprogressmobilityl2c            # print DDL
+#   python schema.py --project cityprogressmobilityl2c --apply    # create missing tables
+#   python schema.py --project cityprogressmobilityl2c --estimate # dry-run integration_query.sql
+#
+# Column types match the live tables: vehicle_locations.timestamp and
+# gtfs_summary_norm.scheduled_time are DATETIME (integration_query.sql casts
+# them with TIMESTAMP()), incidents.event_time is TIMESTAMP.
+#
+# CREATE TABLE IF NOT EXISTS leaves existing tables alone, so --apply then
+# checks every table against TABLES and exits non-zero on any mismatch. A
+# table created before this layout existed has to be recreated to pick up
+# partitioning; BigQuery cannot add it in place. Since the types already
+# match, a copy keeps them:
+#   CREATE TABLE real_time.vehicle_locations_new
+#   PARTITION BY DATE(timestamp) CLUSTER BY vehicle_id
+#   AS SELECT * FROM real_time.vehicle_locations;
+# then drop the old table and rename the new one (ALTER TABLE ... RENAME TO).
+
+import argparse
+import os
+import sys
+
+# dataset.table -> columns, partition column, cluster columns
+TABLES = {
+    "real_time.vehicle_locations": {
+        "columns": [
+            ("vehicle_id", "STRING"),
+            ("timestamp",  "DATETIME"),
+            ("lat",        "FLOAT64"),
+            ("lon",        "FLOAT64"),
+        ],
+        "partition_by": "timestamp",
+        "cluster_by":   ["vehicle_id"],
+    },
+    "real_time.incidents": {
+        "columns": [
+            ("potential_address", "STRING"),
+            ("description",       "STRING"),
+            ("severity",          "INT64"),
+            ("event_time",        "TIMESTAMP"),
+            ("source_blob",       "STRING"),
+        ],
+        "partition_by": "event_time",
+        "cluster_by":   ["potential_address"],
+    },
+    "legacy_gtfs.gtfs_summary_norm": {
+        "columns": [
+            ("route_id",       "STRING"),
+            ("stop_id",        "STRING"),
+            ("stop_name",      "STRING"),
+            ("scheduled_time", "DATETIME"),
+        ],
+        "partition_by": "scheduled_time",
+        "cluster_by":   ["route_id", "stop_id"],
+    },
+}
+
+
+def create_table_ddl(project: str, table: str) -> str:
+    spec = TABLES[table]
+    columns = ",\n".join(f"  `{name}` {type_}" for name, type_ in spec["columns"])
+    return (
+        f"CREATE TABLE IF NOT EXISTS `{project}.{table}` (\n{columns}\n)\n"
+        f"PARTITION BY DATE({spec['partition_by']})\n"
+        f"CLUSTER BY {', '.join(spec['cluster_by'])}"
+    )
+
+
+def ensure_tables(client, project: str) -> None:
+    """
+    Creates any missing source table with its partitioning and clustering.
+    """
+    for table in TABLES:
+        client.query(create_table_ddl(project, table)).result()
+
+
+# The tables API reports legacy SQL type names
+_LEGACY_TYPES = {"INTEGER": "INT64", "FLOAT": "FLOAT64", "BOOLEAN": "BOOL"}
+
+
+def check_tables(client, project: str) -> list:
+    """
+    Compares each existing table's partitioning, clustering and column types
+    with TABLES. Returns one message per mismatch; empty if all match.
+    """
+    problems = []
+    for table, spec in TABLES.items():
+        table_id = f"{project}.{table}"
+        actual = client.get_table(table_id)
+        partitioning = actual.time_partitioning
+        if partitioning is None or partitioning.field != spec["partition_by"]:
+            field = partitioning.field if partitioning is not None else None
+            problems.append(f"{table_id}: partitioned on {field!r}, expected {spec['partition_by']!r}")
+        if list(actual.clustering_fields or []) != spec["cluster_by"]:
+            problems.append(f"{table_id}: clustered by {actual.clustering_fields}, expected {spec['cluster_by']}")
+        types = {field.name: _LEGACY_TYPES.get(field.field_type, field.field_type) for field in actual.schema}
+        for name, type_ in spec["columns"]:
+            if types.get(name) != type_:
+                problems.append(f"{table_id}: column {name} is {types.get(name)}, expected {type_}")
+    return problems
+
+
+def dry_run_bytes(client, sql: str) -> int:
+    """
+    Returns the bytes BigQuery would scan for `sql`, without running it.
+    """
+    from google.cloud import bigquery
+    job_config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
+    return client.query(sql, job_config=job_config).total_bytes_processed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create or inspect the integration source tables")
+    parser.add_argument("--project", default=os.environ.get("BQ_PROJECT"), required="BQ_PROJECT" not in os.environ)
+    parser.add_argument("--apply", action="store_true", help="create missing tables")
+    parser.add_argument("--estimate", action="store_true", help="dry-run integration_query.sql and report bytes scanned")
+    args = parser.parse_args()
+
+    if not args.apply and not args.estimate:
+        for table in TABLES:
+            print(create_table_ddl(args.project, table) + ";\n")
+        return
+
+    from google.cloud import bigquery
+    client = bigquery.Client(project=args.project)
+    if args.apply:
+        ensure_tables(client, args.project)
+        problems = check_tables(client, args.project)
+        if problems:
+            for problem in problems:
+                print(problem, file=sys.stderr)
+            sys.exit(f"{len(problems)} mismatch(es) with the expected layout; recreate those tables (see the header of schema.py)")
+        print(f"Ensured {len(TABLES)} tables in {args.project}, all partitioned and clustered as expected")
+    if args.estimate:
+        here = os.path.dirname(os.path.abspath(__file__))
+        with open(os.path.join(here, "integration_query.sql")) as f:
+            sql = f.read()
+        print(f"integration_query.sql would scan {dry_run_bytes(client, sql):,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ from datetime import datetime, timedelta, timezone
 import functions_framework
 from google.cloud import storage, bigquery
 
+import instrumentation
+
 # Environment
 PROCESSED_BUCKET = os.environ['PROCESSED_BUCKET']  # e.g. cityprogressmobilityl2c-incidents
 PREFIX           = os.environ.get('FOLDER_PREFIX', 'reports')
@@ -14,6 +16,12 @@ BQ_TABLE         = os.environ['BQ_TABLE']           # e.g. cityprogressmobilityl
 storage_client = storage.Client()
 bq_client      = bigquery.Client()
 
+# Metrics
+PARSE_SECONDS = instrumentation.Histogram(
+    "process_reports_parse_seconds", "Download + parse time per report blob.")
+BLOBS = instrumentation.Counter(
+    "process_reports_blobs_total", "Report blobs parsed.")
+
 # Severity mapping for news (“1” to “5”), tweets get 0
 def map_severity(val: str) -> int:
     try:
@@ -76,6 +84,14 @@ def parse_txt_blob(blob) -> list[dict]:
 
 @functions_framework.http
 def handler(request):
+    instrumentation.start_request(getattr(request, "headers", None))
+    try:
+        return process_recent_reports()
+    finally:
+        instrumentation.log_metrics()
+
+
+def process_recent_reports():
     now   = datetime.now(timezone.utc)
     window_start = now - timedelta(hours=1, minutes=9)
     date_str = now.strftime("%Y%m%d")
@@ -90,7 +106,9 @@ def handler(request):
         # Use blob.create_time to filter by last 69 minutes
         if blob.time_created < window_start:
             continue
-        all_rows.extend(parse_txt_blob(blob))
+        with instrumentation.span("process_reports.parse_blob", PARSE_SECONDS):
+            all_rows.extend(parse_txt_blob(blob))
+        BLOBS.inc()
 
     # Insert into BigQuery
     if all_rows:
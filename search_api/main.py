@@ -1,52 +1,49 @@
 import os
-from fastapi import FastAPI, Query, HTTPException
+import json
+import threading
+import time
+from fastapi import FastAPI, Query, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 
 from elasticsearch import Elasticsearch, ElasticsearchException
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from pydantic import BaseModel, Field
 import traceback
-from google.cloud import secretmanager
 
-def access_secret(secret_name: str) -> str:
-    """
-    Reads the latest version of the given secret from Secret Manager.
-    Expects that the Cloud Run service account has "secretmanager.secretAccessor" on each secret.
-    """
-    project_id = os.getenv("GCP_PROJECT") or os.getenv("GOOGLE_CLOUD_PROJECT")
-    if not project_id:
-        raise RuntimeError("GCP_PROJECT (or GOOGLE_CLOUD_PROJECT) must be set")
+import instrumentation
+import startup
+import tiles
 
-    client = secretmanager.SecretManagerServiceClient()
-    name = f"projects/{project_id}/secrets/{secret_name}/versions/latest"
-    response = client.access_secret_version(name=name)
-    return response.payload.data.decode("UTF-8")
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; the stdlib encoder is used when it is not installed
+    orjson = None
 
 
 # ------------------------------------------------------------------------------
-# 1) Fetch ES_ENDPOINT and ES_API_KEY from Secret Manager on cold start
+# 1) Secrets and Elasticsearch client, resolved lazily
 # ------------------------------------------------------------------------------
+# ES_ENDPOINT / ES_API_KEY come from the env (ELASTIC_ENDPOINT,
+# ELASTIC_API_KEY), $SECRETS_DIR, or Secret Manager, in that order. Both
+# secrets are fetched in parallel on first use, so importing this module never
+# touches the network and does not require GCP_PROJECT.
 
-ES_ENDPOINT = access_secret("elastic-endpoint")
-ES_API_KEY   = access_secret("elastic-api-key")
+def _build_es() -> Elasticsearch:
+    secrets = startup.get_secrets("elastic-endpoint", "elastic-api-key")
+    return Elasticsearch([secrets["elastic-endpoint"]], api_key=secrets["elastic-api-key"])
 
-# DEBUG: Uncomment to verify the values in Cloud Run logs
-# print(f"[DEBUG] ES_ENDPOINT={ES_ENDPOINT!r}")
-# print(f"[DEBUG] ES_API_KEY={'<redacted>' if ES_API_KEY else None}")
+get_es = startup.lazy(_build_es)
 
-# ------------------------------------------------------------------------------
-# 2) Initialize Elasticsearch client
-# ------------------------------------------------------------------------------
 
-try:
-    es = Elasticsearch([ES_ENDPOINT], api_key=ES_API_KEY)
-except Exception:
-    print("[DEBUG] Elasticsearch client init failed:")
-    traceback.print_exc()
-    es = None
+def _warm_es() -> None:
+    # Opens the first pooled connection so the first request skips the TLS handshake
+    get_es().ping()
+
 
 # ------------------------------------------------------------------------------
-# 3) FastAPI setup and Pydantic models
+# 2) FastAPI setup
 # ------------------------------------------------------------------------------
 
 app = FastAPI(
@@ -63,8 +60,56 @@ app.add_middleware(
 )
 
 
+# ------------------------------------------------------------------------------
+# 3) Background warm-up
+# ------------------------------------------------------------------------------
+
+@app.on_event("startup")
+def warm_up_clients() -> None:
+    startup.warm_up(_warm_es)
+
+
+# ------------------------------------------------------------------------------
+# 4) Metrics and request tracing
+# ------------------------------------------------------------------------------
 
-# 3) Pydantic models
+REQUESTS = instrumentation.Counter(
+    "http_requests_total", "HTTP requests by route and status.", ("path", "status"))
+REQUEST_SECONDS = instrumentation.Histogram(
+    "http_request_duration_seconds", "End-to-end request latency by route.", ("path",))
+QUERY_BUILD_SECONDS = instrumentation.Histogram(
+    "search_query_build_seconds", "Time spent building the ES query body.")
+ES_SECONDS = instrumentation.Histogram(
+    "search_es_seconds", "Client-side ES round trip, by endpoint.", ("endpoint",))
+ES_TOOK_SECONDS = instrumentation.Histogram(
+    "search_es_took_seconds", "Server-side ES time as reported in `took`.")
+SERIALIZE_SECONDS = instrumentation.Histogram(
+    "search_serialize_seconds", "Time spent encoding the response body, by format.", ("format",))
+TILE_REQUESTS = instrumentation.Counter(
+    "tile_requests_total", "Tile requests by cache outcome (hit, miss, not_modified).", ("result",))
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    request_id = instrumentation.start_request(request.headers)
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template (e.g. /tiles/{z}/{x}/{y}) to keep cardinality bounded
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    REQUEST_SECONDS.observe(time.perf_counter() - start, path=path)
+    REQUESTS.inc(path=path, status=response.status_code)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(content=instrumentation.render(), media_type=instrumentation.CONTENT_TYPE)
+
+
+
+# 5) Pydantic models
 class Hit(BaseModel):
     vehicle_id: str
     ping_ts: str
@@ -81,11 +126,116 @@ class SearchResponse(BaseModel):
     total: int
     results: List[Hit]
 
+class ColumnarSearchResponse(BaseModel):
+    total: int
+    count: int
+    vehicle_ids: List[str]
+    ping_times: List[str]
+    stop_ids: List[str]
+    sched_times: List[str]
+    delays: List[int]
+    lats: List[float]
+    lons: List[float]
+    incident_counts: List[int]
+
 # ------------------------------------------------------------------------------
-# 4) /search endpoint
+# 6) Response encoding
 # ------------------------------------------------------------------------------
 
-@app.get("/search", response_model=SearchResponse)
+ES_INDEX = "transit-integrated"
+
+JSON_MEDIA_TYPE = "application/json"
+GEOJSON_MEDIA_TYPE = "application/geo+json"
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+COLUMNAR_MEDIA_TYPE = "application/vnd.transit.columnar+json"
+
+# Fields requested from ES; also the field order of each hit in the JSON output
+SOURCE_FIELDS = [
+    "vehicle_id",
+    "ping_ts",
+    "stop_id",
+    "schedu_ts",
+    "delay_sec",
+    "location",
+    "incident_count"
+]
+
+
+def dumps(payload) -> bytes:
+    """
+    Encodes a response payload to JSON bytes, using orjson when available.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def to_columnar(total: int, hits: List[dict]) -> dict:
+    """
+    Pivots a list of hit documents into one array per field.
+    """
+    return {
+        "total":           total,
+        "count":           len(hits),
+        "vehicle_ids":     [h["vehicle_id"] for h in hits],
+        "ping_times":      [h["ping_ts"] for h in hits],
+        "stop_ids":        [h["stop_id"] for h in hits],
+        "sched_times":     [h["schedu_ts"] for h in hits],
+        "delays":          [h["delay_sec"] for h in hits],
+        "lats":            [h["location"]["lat"] for h in hits],
+        "lons":            [h["location"]["lon"] for h in hits],
+        "incident_counts": [h["incident_count"] for h in hits],
+    }
+
+
+def accept_quality(accept: Optional[str], media_type: str) -> float:
+    """
+    The q-value the Accept header gives `media_type`, taken from its most
+    specific matching media range (type/subtype, then type/*, then */*);
+    0 if no range matches. A missing header accepts everything.
+    """
+    if not accept:
+        return 1.0
+    main_type = media_type.split("/")[0]
+    specificity = {media_type: 2, f"{main_type}/*": 1, "*/*": 0}
+    best, quality = -1, 0.0
+    for media_range in accept.split(","):
+        range_type, *params = media_range.split(";")
+        rank = specificity.get(range_type.strip().lower())
+        if rank is None or rank <= best:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        best, quality = rank, q
+    return quality
+
+
+def wants_columnar(format_: Optional[str], accept: Optional[str]) -> bool:
+    """
+    An explicit `format=` wins; otherwise columnar only when the Accept
+    header rates it above plain JSON (so q=0 and wildcards pick JSON).
+    """
+    if format_ is not None:
+        if format_ not in ("json", "columnar"):
+            raise HTTPException(status_code=400, detail="`format` must be 'json' or 'columnar'")
+        return format_ == "columnar"
+    return accept_quality(accept, COLUMNAR_MEDIA_TYPE) > accept_quality(accept, JSON_MEDIA_TYPE)
+
+# ------------------------------------------------------------------------------
+# 7) /search endpoint
+# ------------------------------------------------------------------------------
+
+@app.get(
+    "/search",
+    response_model=SearchResponse,
+    responses={200: {"content": {COLUMNAR_MEDIA_TYPE: {"schema": ColumnarSearchResponse.schema()}}}}
+)
 async def search(
     route_id: Optional[str] = Query(None, description="Route number (e.g. 2 → matches vehicle_id '2.0_*')"),
     min_delay: Optional[int] = Query(None, ge=0),
@@ -93,81 +243,99 @@ async def search(
     bbox: Optional[str] = Query(None),
     time_from: Optional[str] = Query(None),
     time_to: Optional[str] = Query(None),
-    size: int = Query(25, ge=1, le=100)
+    size: int = Query(25, ge=1, le=100),
+    format_: Optional[str] = Query(None, alias="format", description="'json' (default) or 'columnar'"),
+    accept: Optional[str] = Header(None)
 ):
     try:
-        must_clauses = []
-        filter_clauses = []
-
-        # 1) Route filter via prefix on vehicle_id (e.g. "2.0_")
-        if route_id:
-            prefix_val = f"{route_id}.0_"
-            must_clauses.append({"prefix": {"vehicle_id": prefix_val}})
-
-        # 2) Delay filter
-        if min_delay is not None:
-            must_clauses.append({"range": {"delay_sec": {"gte": min_delay}}})
-
-        # 3) Incident filter
-        if min_incidents is not None:
-            must_clauses.append({"range": {"incident_count": {"gte": min_incidents}}})
-
-        # 4) Time-range filter
-        if time_from or time_to:
-            ts_range = {}
-            if time_from:
-                ts_range["gte"] = time_from
-            if time_to:
-                ts_range["lte"] = time_to
-            must_clauses.append({"range": {"ping_ts": ts_range}})
-
-        # 5) Geobounding box filter
-        if bbox:
-            try:
-                lat1, lon1, lat2, lon2 = map(float, bbox.split(","))
-                filter_clauses.append({
-                    "geo_bounding_box": {
-                        "location": {
-                            "top_left":     {"lat": lat2, "lon": lon1},
-                            "bottom_right": {"lat": lat1, "lon": lon2}
+        columnar = wants_columnar(format_, accept)
+
+        with instrumentation.span("search.query_build", QUERY_BUILD_SECONDS):
+            must_clauses = []
+            filter_clauses = []
+
+            # 1) Route filter via prefix on vehicle_id (e.g. "2.0_")
+            if route_id:
+                prefix_val = f"{route_id}.0_"
+                must_clauses.append({"prefix": {"vehicle_id": prefix_val}})
+
+            # 2) Delay filter
+            if min_delay is not None:
+                must_clauses.append({"range": {"delay_sec": {"gte": min_delay}}})
+
+            # 3) Incident filter
+            if min_incidents is not None:
+                must_clauses.append({"range": {"incident_count": {"gte": min_incidents}}})
+
+            # 4) Time-range filter
+            if time_from or time_to:
+                ts_range = {}
+                if time_from:
+                    ts_range["gte"] = time_from
+                if time_to:
+                    ts_range["lte"] = time_to
+                must_clauses.append({"range": {"ping_ts": ts_range}})
+
+            # 5) Geobounding box filter
+            if bbox:
+                try:
+                    lat1, lon1, lat2, lon2 = map(float, bbox.split(","))
+                    filter_clauses.append({
+                        "geo_bounding_box": {
+                            "location": {
+                                "top_left":     {"lat": lat2, "lon": lon1},
+                                "bottom_right": {"lat": lat1, "lon": lon2}
+                            }
                         }
-                    }
-                })
-            except Exception:
-                raise HTTPException(status_code=400, detail="`bbox` must be four comma-separated floats: lat1,lon1,lat2,lon2")
+                    })
+                except Exception:
+                    raise HTTPException(status_code=400, detail="`bbox` must be four comma-separated floats: lat1,lon1,lat2,lon2")
 
-        # If no must_clauses provided, match all
-        if not must_clauses:
-            must_clauses = [{"match_all": {}}]
+            # If no must_clauses provided, match all
+            if not must_clauses:
+                must_clauses = [{"match_all": {}}]
 
-        query_body = {
-            "query": {
-                "bool": {
-                    "must":   must_clauses,
-                    "filter": filter_clauses
-                }
-            },
-            "size": size,
-            "_source": [
-                "vehicle_id",
-                "ping_ts",
-                "stop_id",
-                "schedu_ts",
-                "delay_sec",
-                "location",
-                "incident_count"
-            ]
-        }
+            query_body = {
+                "query": {
+                    "bool": {
+                        "must":   must_clauses,
+                        "filter": filter_clauses
+                    }
+                },
+                "size": size,
+                "_source": SOURCE_FIELDS
+            }
 
-        # Execute search
+        # Execute search; filter_path trims everything but what we serialize
         try:
-            resp = es.search(index="transit-integrated", body=query_body)
+            with instrumentation.span("search.es", ES_SECONDS, endpoint="search"):
+                resp = get_es().search(
+                    index=ES_INDEX,
+                    body=query_body,
+                    filter_path=["took", "hits.total.value", "hits.hits._source"]
+                )
         except ElasticsearchException as e:
             raise HTTPException(status_code=500, detail=f"Elasticsearch query failed: {str(e)}")
+        ES_TOOK_SECONDS.observe(resp.get("took", 0) / 1000)
 
-        hits = [hit["_source"] for hit in resp["hits"]["hits"]]
+        # ES omits "hits.hits" entirely under filter_path when nothing matched
+        hits = [hit["_source"] for hit in resp["hits"].get("hits", [])]
         total = resp["hits"]["total"]["value"]
-        return {"total": total, "results": hits}
+
+        # The index mapping already guarantees the Hit shape, so return a raw
+        # Response and skip FastAPI's response_model re-validation
+        fmt = "columnar" if columnar else "json"
+        with instrumentation.span("search.serialize", SERIALIZE_SECONDS, format=fmt):
+            if columnar:
+                body = dumps(to_columnar(total, hits))
+            else:
+                body = dumps({"total": total, "results": hits})
+        # The body depends on Accept, so caches must key on it
+        return Response(
+            content=body,
+            media_type=COLUMNAR_MEDIA_TYPE if columnar else JSON_MEDIA_TYPE,
+            headers={"Vary": "Accept"}
+        )
 
     except HTTPException:
         # Re‐raise HTTPExceptions (400/500) directly
@@ -176,3 +344,201 @@ async def search(
         # Print full traceback for Cloud Run logs, then return 500
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ------------------------------------------------------------------------------
+# 8) /tiles endpoint
+# ------------------------------------------------------------------------------
+
+# At or below this zoom, tiles carry clustered counts instead of raw pings
+CLUSTER_MAX_ZOOM   = int(os.getenv("TILE_CLUSTER_MAX_ZOOM", 12))
+# geotile_grid cells per tile edge = 2**CLUSTER_PRECISION_STEP
+CLUSTER_PRECISION_STEP = 5
+TILE_MAX_POINTS    = int(os.getenv("TILE_MAX_POINTS", 500))
+TILE_CACHE_SIZE    = int(os.getenv("TILE_CACHE_SIZE", 2048))
+TILE_MAX_AGE_SEC   = int(os.getenv("TILE_MAX_AGE_SEC", 60))
+# Tiles only show pings this recent, counted back from the newest indexed ping
+TILE_WINDOW_SEC    = int(os.getenv("TILE_WINDOW_SEC", 900))
+# How long a looked-up index generation is trusted before asking ES again
+GENERATION_TTL_SEC = int(os.getenv("INDEX_GENERATION_TTL_SEC", 30))
+
+tile_cache = tiles.TileCache(TILE_CACHE_SIZE)
+_generation = {"value": None, "checked_at": 0.0}
+_generation_lock = threading.Lock()
+
+
+def index_generation() -> Optional[int]:
+    """
+    Returns the newest indexed ping_ts (epoch millis), or None for an empty
+    index. Pings only move forward, so unlike the indexing stats counters
+    this survives node restarts and shard relocation. A re-index that only
+    rewrites existing pings (same ping_ts) does not bump it, so such changes
+    show up with the next new ping; tile ETags are weak for that reason.
+    Cached for GENERATION_TTL_SEC; one lookup at a time, the other threads
+    wait for its result.
+    """
+    with _generation_lock:
+        now = time.monotonic()
+        if _generation["checked_at"] == 0.0 or now - _generation["checked_at"] > GENERATION_TTL_SEC:
+            resp = get_es().search(
+                index=ES_INDEX,
+                body={"size": 0, "aggs": {"latest": {"max": {"field": "ping_ts"}}}},
+                filter_path=["aggregations.latest.value"]
+            )
+            latest = resp.get("aggregations", {}).get("latest", {}).get("value")
+            _generation["value"] = int(latest) if latest is not None else None
+            _generation["checked_at"] = now
+        return _generation["value"]
+
+
+def tile_query(z: int, x: int, y: int, generation: Optional[int]) -> dict:
+    filters = [tiles.bbox_filter(z, x, y)]
+    if generation is not None:
+        filters.append({"range": {"ping_ts": {
+            "gte": generation - TILE_WINDOW_SEC * 1000,
+            "format": "epoch_millis"
+        }}})
+    return {"bool": {"filter": filters}}
+
+
+def fetch_tile_features(z: int, x: int, y: int, generation: Optional[int]) -> Tuple[List[dict], bool]:
+    """
+    Features for one tile within TILE_WINDOW_SEC of `generation`, and whether
+    a size cap cut the result short. The window is anchored on the
+    generation rather than the wall clock so a cached tile stays valid for as
+    long as its ETag does.
+
+    Collapse and cardinality on vehicle_id need it mapped as keyword, as in
+    the index mapping es_indexer_fn creates (INDEX_MAPPING there).
+    """
+    if z <= CLUSTER_MAX_ZOOM:
+        # geo_bounding_box includes the tile's edges, so points on the right
+        # and bottom edges land in one more column and row of cells
+        cells = (2 ** CLUSTER_PRECISION_STEP + 1) ** 2
+        query_body = {
+            "size": 0,
+            "query": tile_query(z, x, y, generation),
+            "aggs": {
+                "cells": {
+                    "geotile_grid": {
+                        "field": "location",
+                        "precision": min(z + CLUSTER_PRECISION_STEP, 29),
+                        "size": cells
+                    },
+                    "aggs": {
+                        "centroid":  {"geo_centroid": {"field": "location"}},
+                        "vehicles":  {"cardinality": {"field": "vehicle_id"}},
+                        "avg_delay": {"avg": {"field": "delay_sec"}},
+                        "max_delay": {"max": {"field": "delay_sec"}}
+                    }
+                }
+            }
+        }
+        with instrumentation.span("tiles.es", ES_SECONDS, endpoint="tiles"):
+            resp = get_es().search(index=ES_INDEX, body=query_body, filter_path=["aggregations"])
+        buckets = resp["aggregations"]["cells"]["buckets"]
+        return tiles.cluster_features(buckets), len(buckets) >= cells
+
+    # One hit per vehicle, at its latest ping; one extra hit tells whether
+    # the cap cut anything off
+    query_body = {
+        "size": TILE_MAX_POINTS + 1,
+        "query": tile_query(z, x, y, generation),
+        "sort": [{"ping_ts": "desc"}],
+        "collapse": {"field": "vehicle_id"},
+        "_source": SOURCE_FIELDS
+    }
+    with instrumentation.span("tiles.es", ES_SECONDS, endpoint="tiles"):
+        resp = get_es().search(index=ES_INDEX, body=query_body, filter_path=["hits.hits._source"])
+    hits = [hit["_source"] for hit in resp.get("hits", {}).get("hits", [])]
+    return tiles.point_features(hits[:TILE_MAX_POINTS]), len(hits) > TILE_MAX_POINTS
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match check using the weak comparison RFC 7232 requires for it:
+    W/ prefixes on either side are ignored, and * matches any current
+    representation.
+    """
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+
+@app.get(
+    "/tiles/{z}/{x}/{y}",
+    responses={
+        200: {"content": {GEOJSON_MEDIA_TYPE: {}, MVT_MEDIA_TYPE: {}}},
+        304: {"description": "Tile unchanged since the given ETag"}
+    }
+)
+def tile(
+    z: int,
+    x: int,
+    y: int,
+    format_: Optional[str] = Query(None, alias="format", description="'geojson' (default) or 'mvt'"),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
+    try:
+        if not tiles.is_valid_tile(z, x, y):
+            raise HTTPException(status_code=400, detail=f"Invalid tile {z}/{x}/{y}")
+
+        if format_ is not None and format_ not in ("geojson", "mvt"):
+            raise HTTPException(status_code=400, detail="`format` must be 'geojson' or 'mvt'")
+        fmt = format_
+        if fmt is None:
+            mvt = accept_quality(accept, MVT_MEDIA_TYPE) > accept_quality(accept, GEOJSON_MEDIA_TYPE)
+            fmt = "mvt" if mvt else "geojson"
+        if fmt == "mvt" and tiles.mapbox_vector_tile is None:
+            raise HTTPException(status_code=406, detail="MVT tiles are not available on this server")
+        media_type = MVT_MEDIA_TYPE if fmt == "mvt" else GEOJSON_MEDIA_TYPE
+
+        try:
+            generation = index_generation()
+        except ElasticsearchException as e:
+            raise HTTPException(status_code=500, detail=f"Elasticsearch generation lookup failed: {str(e)}")
+
+        # Weak: the body is rebuilt per instance and after eviction, and equal
+        # sort keys or bucket counts may come back in a different order
+        etag = f'W/"{generation or 0}-{z}-{x}-{y}-{fmt}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={TILE_MAX_AGE_SEC}",
+            "Vary": "Accept"
+        }
+        if etag_matches(if_none_match, etag):
+            TILE_REQUESTS.inc(result="not_modified")
+            return Response(status_code=304, headers=headers)
+
+        key = (generation, z, x, y, fmt)
+        cached = tile_cache.get(key)
+        TILE_REQUESTS.inc(result="hit" if cached is not None else "miss")
+        if cached is None:
+            try:
+                features, truncated = fetch_tile_features(z, x, y, generation)
+            except ElasticsearchException as e:
+                raise HTTPException(status_code=500, detail=f"Elasticsearch query failed: {str(e)}")
+            with instrumentation.span("tiles.serialize", SERIALIZE_SECONDS, format=fmt):
+                if fmt == "mvt":
+                    body = tiles.to_mvt(z, x, y, features, truncated)
+                else:
+                    body = dumps(tiles.to_geojson(features, truncated))
+            cached = (body, truncated)
+            tile_cache.put(key, cached)
+        body, truncated = cached
+
+        if truncated:
+            headers["X-Tile-Truncated"] = "true"
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,181 @@
+# search_api/tiles.py
+#
+# Slippy-map tile helpers for the /tiles endpoint: tile math, GeoJSON / MVT
+# encoding and a small in-process tile cache.
+
+import math
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+try:
+    import mapbox_vector_tile
+except ImportError:
+    # MVT output is optional; GeoJSON tiles work without it
+    mapbox_vector_tile = None
+
+MAX_ZOOM = 22
+MVT_EXTENT = 4096
+LAYER_NAME = "vehicles"
+
+
+def is_valid_tile(z: int, x: int, y: int) -> bool:
+    if z < 0 or z > MAX_ZOOM:
+        return False
+    n = 1 << z
+    return 0 <= x < n and 0 <= y < n
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    Returns (west, south, east, north) in degrees for a Web Mercator tile.
+    """
+    n = 1 << z
+
+    def lat(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    return west, lat(y + 1), east, lat(y)
+
+
+def bbox_filter(z: int, x: int, y: int) -> dict:
+    """
+    ES geo_bounding_box clause covering the tile.
+    """
+    west, south, east, north = tile_bounds(z, x, y)
+    return {
+        "geo_bounding_box": {
+            "location": {
+                "top_left":     {"lat": north, "lon": west},
+                "bottom_right": {"lat": south, "lon": east}
+            }
+        }
+    }
+
+
+def tile_pixel(z: int, x: int, y: int, lat: float, lon: float) -> Tuple[int, int]:
+    """
+    Projects lat/lon into MVT tile coordinates (origin bottom-left, as
+    mapbox_vector_tile expects by default).
+    """
+    n = 1 << z
+    lat = max(min(lat, 85.0511), -85.0511)
+    merc_x = (lon + 180.0) / 360.0 * n
+    merc_y = (1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n
+    px = int(round((merc_x - x) * MVT_EXTENT))
+    py_down = int(round((merc_y - y) * MVT_EXTENT))
+    return px, MVT_EXTENT - py_down
+
+
+# ------------------------------------------------------------------------------
+# Feature builders (shared by both output formats)
+# ------------------------------------------------------------------------------
+
+def point_features(hits: List[dict]) -> List[dict]:
+    """
+    One feature per vehicle ping (high zoom levels).
+    """
+    return [
+        {
+            "lat": h["location"]["lat"],
+            "lon": h["location"]["lon"],
+            "properties": {
+                "vehicle_id":     h["vehicle_id"],
+                "ping_ts":        h["ping_ts"],
+                "delay_sec":      h["delay_sec"],
+                "incident_count": h["incident_count"]
+            }
+        }
+        for h in hits
+    ]
+
+
+def cluster_features(buckets: List[dict]) -> List[dict]:
+    """
+    One feature per geotile_grid cell, placed at the cell's centroid
+    (low zoom levels).
+    """
+    features = []
+    for b in buckets:
+        centroid = b["centroid"]["location"]
+        features.append({
+            "lat": centroid["lat"],
+            "lon": centroid["lon"],
+            "properties": {
+                "cluster":   True,
+                "count":     b["vehicles"]["value"],
+                "pings":     b["doc_count"],
+                "avg_delay": b["avg_delay"]["value"],
+                "max_delay": b["max_delay"]["value"]
+            }
+        })
+    return features
+
+
+def to_geojson(features: List[dict], truncated: bool = False) -> dict:
+    collection = {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [f["lon"], f["lat"]]},
+                "properties": f["properties"]
+            }
+            for f in features
+        ]
+    }
+    if truncated:
+        collection["truncated"] = True
+    return collection
+
+
+def to_mvt(z: int, x: int, y: int, features: List[dict], truncated: bool = False) -> bytes:
+    if mapbox_vector_tile is None:
+        raise RuntimeError("mapbox-vector-tile is not installed")
+    mvt_features = []
+    for f in features:
+        px, py = tile_pixel(z, x, y, f["lat"], f["lon"])
+        # MVT has no null values; drop properties ES left empty
+        props = {k: v for k, v in f["properties"].items() if v is not None}
+        if truncated:
+            # MVT layers carry no metadata of their own
+            props["truncated"] = True
+        mvt_features.append({"geometry": f"POINT ({px} {py})", "properties": props})
+    return mapbox_vector_tile.encode([{"name": LAYER_NAME, "features": mvt_features}])
+
+
+# ------------------------------------------------------------------------------
+# Tile cache
+# ------------------------------------------------------------------------------
+
+class TileCache:
+    """
+    Bounded LRU of (encoded tile, truncated) pairs. Keys include the index
+    generation, so entries from older generations are simply never hit again
+    and age out. Shared by the threadpool workers serving /tiles, hence the
+    lock.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Tuple[bytes, bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[Tuple[bytes, bool]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, entry: Tuple[bytes, bool]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,114 @@
+# shared/startup.py
+#
+# Cold-start helpers: concurrent, cached secret lookup with local overrides,
+# lazily-built clients and background warm-up.
+#
+# Each service is deployed as its own unit, so shared/sync.py copies this
+# file verbatim next to every main.py that uses it (search_api,
+# es_indexer_fn). Edit it here, then run the sync;
+# `python shared/sync.py --check` fails if a copy has drifted.
+
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+_secret_cache: Dict[str, str] = {}
+_secret_lock = threading.Lock()
+
+
+def _env_name(secret_name: str) -> str:
+    # "elastic-endpoint" -> "ELASTIC_ENDPOINT"
+    return secret_name.upper().replace("-", "_")
+
+
+def _local_override(secret_name: str):
+    """
+    Returns a secret from the environment or from $SECRETS_DIR/<secret_name>
+    (e.g. a Cloud Run secret volume mount), or None.
+    """
+    value = os.getenv(_env_name(secret_name))
+    if value:
+        return value
+    secrets_dir = os.getenv("SECRETS_DIR")
+    if secrets_dir:
+        path = os.path.join(secrets_dir, secret_name)
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                return f.read().strip()
+    return None
+
+
+def get_secrets(*secret_names: str) -> Dict[str, str]:
+    """
+    Resolves the given secrets, checking the cache and local overrides first
+    and fetching whatever is left from Secret Manager in parallel.
+    """
+    with _secret_lock:
+        missing = [n for n in secret_names if n not in _secret_cache]
+        for name in list(missing):
+            value = _local_override(name)
+            if value is not None:
+                _secret_cache[name] = value
+                missing.remove(name)
+
+        if missing:
+            project_id = os.getenv("GCP_PROJECT") or os.getenv("GOOGLE_CLOUD_PROJECT")
+            if not project_id:
+                raise RuntimeError("GCP_PROJECT (or GOOGLE_CLOUD_PROJECT) must be set")
+
+            # Imported here: the gRPC stack is slow to import and is not
+            # needed at all when every secret is overridden locally
+            from google.cloud import secretmanager
+            client = secretmanager.SecretManagerServiceClient()
+
+            def fetch(name: str) -> str:
+                path = f"projects/{project_id}/secrets/{name}/versions/latest"
+                response = client.access_secret_version(name=path)
+                return response.payload.data.decode("UTF-8")
+
+            with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+                for name, value in zip(missing, pool.map(fetch, missing)):
+                    _secret_cache[name] = value
+
+        return {n: _secret_cache[n] for n in secret_names}
+
+
+def lazy(factory: Callable[[], T]) -> Callable[[], T]:
+    """
+    Wraps a client factory so the client is built once, on first call, and
+    shared afterwards. Safe to call from several threads.
+    """
+    lock = threading.Lock()
+    holder = []
+
+    def get() -> T:
+        if not holder:
+            with lock:
+                if not holder:
+                    holder.append(factory())
+        return holder[0]
+
+    return get
+
+
+def warm_up(*steps: Callable[[], object]) -> threading.Thread:
+    """
+    Runs the given callables in order on a daemon thread, so secrets and
+    connections are ready by the time the first request arrives. Failures are
+    logged, not raised; the first request will retry and surface them.
+    """
+    def run():
+        for step in steps:
+            try:
+                step()
+            except Exception:
+                print(f"[WARN] warm-up step {getattr(step, '__name__', step)} failed:")
+                traceback.print_exc()
+
+    t = threading.Thread(target=run, name="warm-up", daemon=True)
+    t.start()
+    return t
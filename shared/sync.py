@@ -0,0 +1,68 @@
+# shared/sync.py
+#
+# Copies the shared modules into the deploy units that use them. Each service
+# directory is uploaded on its own (Cloud Run build, Cloud Functions source),
+# so the copies have to be real files next to its main.py; this keeps them
+# identical to the sources in shared/.
+#
+# Usage:
+#   python shared/sync.py           # rewrite every copy from shared/
+#   python shared/sync.py --check   # exit non-zero if any copy differs
+
+import argparse
+import os
+import sys
+
+SHARED_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SHARED_DIR)
+
+# module -> service directories that ship a copy (note the trailing spaces in
+# the Cloud Function directory names)
+TARGETS = {
+    "instrumentation.py": [
+        "search_api",
+        os.path.join("cloud_functions", "es_indexer_fn "),
+        os.path.join("cloud_functions", "gps_publisher_fn "),
+        os.path.join("cloud_functions", "process_reports "),
+    ],
+    "startup.py": [
+        "search_api",
+        os.path.join("cloud_functions", "es_indexer_fn "),
+    ],
+}
+
+
+def _read(path: str):
+    if not os.path.isfile(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Copy shared/ modules into each service")
+    parser.add_argument("--check", action="store_true", help="only report copies that differ")
+    args = parser.parse_args()
+
+    stale = []
+    for module, services in TARGETS.items():
+        source = _read(os.path.join(SHARED_DIR, module))
+        for service in services:
+            copy = os.path.join(REPO_ROOT, service, module)
+            if _read(copy) == source:
+                continue
+            if args.check:
+                stale.append(os.path.relpath(copy, REPO_ROOT))
+                continue
+            with open(copy, "wb") as f:
+                f.write(source)
+            print(f"updated {os.path.relpath(copy, REPO_ROOT)}")
+
+    if stale:
+        print(f"[ERROR] out of sync with shared/: {', '.join(stale)}; run python shared/sync.py")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())